@@ -1,5 +1,6 @@
 # core/context_processors.py
-from core.models import Currency, Wallet
+from core.models import Wallet
+from core.services.currency_registry import currency_registry
 from core.utils.currency import get_user_currency
 
 def currency_processor(request):
@@ -11,7 +12,7 @@ def currency_processor(request):
         currency = get_user_currency(request)
         
         return {
-            'available_currencies': Currency.objects.filter(is_active=True),
+            'available_currencies': currency_registry.active(),
             'current_currency': currency,
             'currency_symbol': currency.symbol,
             'currency_code': currency.code,
@@ -27,7 +28,7 @@ def currency_processor(request):
             exchange_rate = Decimal('1.0')
         
         return {
-            'available_currencies': Currency.objects.filter(is_active=True),
+            'available_currencies': currency_registry.active(),
             'current_currency': FallbackCurrency(),
             'currency_symbol': '$',
             'currency_code': 'USD',
@@ -41,9 +42,9 @@ def get_currency_context(user):
     except Wallet.DoesNotExist:
         currency_code = "USD"
     
-    current_currency = Currency.objects.filter(code=currency_code, is_active=True).first()
+    current_currency = currency_registry.get(currency_code)
     if not current_currency:
-        current_currency = Currency.objects.filter(is_active=True).first()
+        current_currency = currency_registry.active()[0]
 
     currency_code = current_currency.code
     currency_symbol = current_currency.symbol  # FIX: Get symbol from currency object
@@ -0,0 +1,30 @@
+# management/commands/archive_transactions.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.services.transaction_archive import TransactionArchiver
+
+
+class Command(BaseCommand):
+    help = 'Move settled transactions past the archive horizon into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=settings.TRANSACTION_ARCHIVE_AFTER_DAYS,
+            help='Archive horizon in days (default: TRANSACTION_ARCHIVE_AFTER_DAYS)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=TransactionArchiver.CHUNK_SIZE)
+        parser.add_argument('--limit', type=int, help='Stop after this many rows')
+
+    def handle(self, *args, **options):
+        horizon = TransactionArchiver.horizon(options['older_than_days'])
+        moved = TransactionArchiver.archive(horizon, options['chunk_size'], options['limit'])
+
+        if moved:
+            self.stdout.write(self.style.SUCCESS(
+                f"Archived {moved} transactions created before {horizon:%Y-%m-%d %H:%M}"
+            ))
+        else:
+            self.stdout.write(self.style.WARNING("No transactions to archive"))
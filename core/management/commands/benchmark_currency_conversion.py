@@ -0,0 +1,82 @@
+# management/commands/benchmark_currency_conversion.py
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.currency_registry import currency_registry
+from core.utils.currency import CurrencyConverter, convert_from_usd
+
+
+def legacy_convert_from_usd(amount, currency):
+    """convert_from_usd as it was: re-parses the rate and quantizer per call"""
+    if amount is None:
+        return Decimal("0.00")
+    try:
+        amount_decimal = Decimal(str(amount))
+        rate_decimal = Decimal(str(currency.exchange_rate))
+        if currency.code == "USD":
+            return amount_decimal.quantize(Decimal("0.01"))
+        return (amount_decimal * rate_decimal).quantize(Decimal("0.01"))
+    except (TypeError, ValueError, AttributeError):
+        return Decimal("0.00")
+
+
+def dashboard_amounts(assets=8, transactions=5, durations=5):
+    """The USD amounts the dashboard converts on one render"""
+    def money():
+        return Decimal(random.randint(100, 10_000_000)) / 100
+
+    amounts = [money() for _ in range(4)]  # wallet fields
+    amounts += [money() for _ in range(transactions)]
+    for _ in range(assets):
+        amounts += [money() for _ in range(3)]  # price, min, max
+        amounts += [money() for _ in range(durations * 2)]  # profit, total per duration
+    return amounts
+
+
+class Command(BaseCommand):
+    help = 'Time one dashboard render worth of USD conversions: legacy vs CurrencyConverter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--currency', default='KES')
+        parser.add_argument('--repeat', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        currency = currency_registry.get(options['currency'])
+        if currency is None:
+            raise CommandError(f"Unknown currency {options['currency']} (manage.py seed_currencies)")
+
+        amounts = dashboard_amounts()
+        converter = CurrencyConverter(currency)
+        rows = [
+            ('legacy per-call', lambda: [legacy_convert_from_usd(a, currency) for a in amounts]),
+            ('convert_from_usd()', lambda: [convert_from_usd(a, currency) for a in amounts]),
+            ('converter.convert_many', lambda: converter.convert_many(amounts)),
+        ]
+
+        self.stdout.write(self.style.HTTP_INFO(
+            f"{len(amounts)} conversions per page into {currency.code}, {options['repeat']} pages"
+        ))
+        baseline = None
+        for label, func in rows:
+            timings = self.measure(func, options['repeat'])
+            median = statistics.median(timings) * 1_000_000
+            baseline = baseline or median
+            self.stdout.write(f"{label:<24} median {median:8.1f} µs/page  ({baseline / median:4.1f}x)")
+
+        if rows[0][1]() != rows[2][1]():
+            self.stdout.write(self.style.WARNING("Converted amounts differ"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Converted amounts match"))
+
+    @staticmethod
+    def measure(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return timings
@@ -0,0 +1,112 @@
+# management/commands/benchmark_portfolio_summary.py
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Asset, Investment
+from core.services.portfolio import Portfolio, portfolio_summary
+
+
+def legacy_summary(user):
+    """The per-view aggregates the dashboards used to run (one query each)"""
+    active = Investment.objects.filter(user=user, status='active')
+    completed = Investment.objects.filter(user=user).exclude(status='active')
+    total_profit = completed.filter(actual_profit_loss__gt=0).aggregate(total=Sum('actual_profit_loss'))['total'] or Decimal('0')
+    total_loss = completed.filter(actual_profit_loss__lt=0).aggregate(total=Sum('actual_profit_loss'))['total'] or Decimal('0')
+    invested = completed.aggregate(total=Sum('invested_amount'))['total'] or Decimal('0')
+    invested_total = Investment.objects.filter(user=user).aggregate(total=Sum('invested_amount'))['total'] or Decimal('0')
+    return {
+        'total_profit': total_profit,
+        'total_loss': total_loss,
+        'net_pl': total_profit + total_loss,
+        'completed_invested': invested,
+        'invested_total': invested_total,
+        'active_count': active.count(),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare dashboard portfolio totals: per-view aggregates vs portfolio_summary vs PortfolioStats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--investments', type=int, default=50000, help='History size for the synthetic user')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        asset = Asset.objects.first()
+        if asset is None:
+            raise CommandError("Seed assets first (manage.py seed_assets)")
+
+        # Everything happens in a transaction that is rolled back at the end
+        with transaction.atomic():
+            user = self.synthetic_user(asset, options['investments'])
+            Portfolio.rebuild([user.pk])
+
+            rows = [
+                ('per-view aggregates', lambda: legacy_summary(user)),
+                ('portfolio_summary()', lambda: portfolio_summary(user)),
+                ('PortfolioStats row', lambda: Portfolio.stats_for(user)),
+            ]
+            self.stdout.write(self.style.HTTP_INFO(
+                f"{options['investments']} investments, {options['repeat']} runs each"
+            ))
+            for label, func in rows:
+                queries, timings = self.measure(func, options['repeat'])
+                self.stdout.write(
+                    f"{label:<22} {queries:>2} queries  "
+                    f"median {statistics.median(timings) * 1000:8.2f} ms  "
+                    f"max {max(timings) * 1000:8.2f} ms"
+                )
+
+            legacy, summary = legacy_summary(user), portfolio_summary(user)
+            if any(legacy[key] != summary[key] for key in legacy):
+                self.stdout.write(self.style.WARNING(f"Totals differ: {legacy} vs {summary}"))
+            else:
+                self.stdout.write(self.style.SUCCESS("Totals match"))
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(func, repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return len(ctx.captured_queries), timings
+
+    @staticmethod
+    def synthetic_user(asset, count):
+        user = get_user_model().objects.create(
+            username='portfolio-benchmark', email='portfolio-benchmark@example.com', phone='+000pf-benchmark'
+        )
+        now = timezone.now()
+        statuses = ['completed'] * 8 + ['active', 'cancelled']
+        Investment.objects.bulk_create(
+            [
+                Investment(
+                    user=user,
+                    asset=asset,
+                    invested_amount=Decimal(random.randint(10, 5000)),
+                    duration_hours=3,
+                    end_time=now - timedelta(hours=random.randint(-3, 5000)),
+                    expected_return_rate=Decimal('5'),
+                    actual_profit_loss=Decimal(random.randint(-500, 800)) / 4,
+                    status=random.choice(statuses),
+                )
+                for _ in range(count)
+            ],
+            batch_size=2000,
+        )
+        return user
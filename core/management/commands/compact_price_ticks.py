@@ -0,0 +1,33 @@
+# management/commands/compact_price_ticks.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.services.tick_archive import tick_archive
+
+
+class Command(BaseCommand):
+    help = 'Move old PriceTick rows into the memory-mapped per-symbol tick archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=7,
+            help='Archive ticks older than this many days (default: 7)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Rows moved per batch (default: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        self.stdout.write(self.style.HTTP_INFO(f"Archiving ticks older than {cutoff:%Y-%m-%d %H:%M}..."))
+
+        moved = tick_archive.compact(cutoff, chunk_size=options['chunk_size'])
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} ticks to {tick_archive.root}"))
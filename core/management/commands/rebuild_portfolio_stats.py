@@ -0,0 +1,15 @@
+# management/commands/rebuild_portfolio_stats.py
+from django.core.management.base import BaseCommand
+
+from core.services.portfolio import Portfolio
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized PortfolioStats rows from the Investment table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only this user id (repeatable)')
+
+    def handle(self, *args, **options):
+        count = Portfolio.rebuild(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt portfolio stats for {count} users"))
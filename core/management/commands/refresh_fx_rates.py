@@ -0,0 +1,48 @@
+# management/commands/refresh_fx_rates.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.fx_rates import FxRates, build_fx_provider
+
+
+class Command(BaseCommand):
+    help = 'Fetch exchange rates, append them to the FxRate history and swap the live rates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--provider', choices=['stub', 'http'], help='Override FX_RATES["PROVIDER"]')
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Keep refreshing every N seconds instead of exiting after one refresh',
+        )
+
+    def handle(self, *args, **options):
+        config = None
+        if options['provider']:
+            from django.conf import settings
+            config = {**getattr(settings, 'FX_RATES', {}), 'PROVIDER': options['provider']}
+        try:
+            provider = build_fx_provider(config)
+        except (KeyError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if not options['interval']:
+            self.refresh(provider)
+            return
+
+        self.stdout.write(self.style.HTTP_INFO(f"Refreshing FX rates every {options['interval']}s"))
+        try:
+            while True:
+                self.refresh(provider)
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("FX rate refresh stopped"))
+
+    def refresh(self, provider):
+        rows = FxRates.refresh(provider)
+        if not rows:
+            self.stdout.write(self.style.WARNING("No rates returned"))
+            return
+        rates = ', '.join(f"{row.currency_code}={row.rate.normalize()}" for row in rows)
+        self.stdout.write(self.style.SUCCESS(f"FX rates v{rows[0].version} ({provider.name}): {rates}"))
@@ -0,0 +1,37 @@
+# management/commands/run_price_ticker.py
+from django.core.management.base import BaseCommand
+
+from core.services.price_ticker import PriceTicker
+
+
+class Command(BaseCommand):
+    help = 'Run the background price ticker (updates asset prices on a per-category schedule)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Update every currently due asset once and exit',
+        )
+        parser.add_argument(
+            '--reload-every',
+            type=int,
+            default=60,
+            help='Seconds between re-reading the active asset list (default: 60)',
+        )
+
+    def handle(self, *args, **options):
+        ticker = PriceTicker(reload_every=options['reload_every'])
+
+        if options['once']:
+            ticker.load()
+            updated = ticker.tick()
+            self.stdout.write(self.style.SUCCESS(f"Updated prices for {updated} assets"))
+            return
+
+        count = ticker.load()
+        self.stdout.write(self.style.HTTP_INFO(f"Price ticker started for {count} assets"))
+        try:
+            ticker.run()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Price ticker stopped"))
@@ -0,0 +1,91 @@
+# management/commands/run_settlement_worker.py
+import multiprocessing
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.services.maturity_scheduler import MaturityScheduler, shard_count
+
+
+def run_shard(shard, resync_every):
+    scheduler = MaturityScheduler(shard=shard, resync_every=resync_every)
+    scheduler.bind()
+    try:
+        scheduler.start()
+        scheduler.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.close()
+
+
+class Command(BaseCommand):
+    help = 'Run the investment settlement worker (settles investments as they mature)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--shard',
+            type=int,
+            help='Run only this shard (default: every shard in SETTLEMENT_WORKER["SHARDS"], one process each)',
+        )
+        parser.add_argument(
+            '--resync-every',
+            type=int,
+            help='Seconds between full reloads of active investments (default: SETTLEMENT_WORKER setting)',
+        )
+
+    def handle(self, *args, **options):
+        shards = shard_count()
+        resync_every = options['resync_every']
+
+        if options['shard'] is not None:
+            if not 0 <= options['shard'] < shards:
+                raise CommandError(f"--shard must be between 0 and {shards - 1}")
+            self.run_single(options['shard'], resync_every)
+        elif shards == 1:
+            self.run_single(0, resync_every)
+        else:
+            self.run_all(shards, resync_every)
+
+    def run_single(self, shard, resync_every):
+        scheduler = MaturityScheduler(shard=shard, resync_every=resync_every)
+        scheduler.bind()
+        replayed, count = scheduler.start()
+        if any(replayed.values()):
+            self.stdout.write(self.style.WARNING(
+                f"Replayed pending settlements: {replayed['applied']} applied, "
+                f"{replayed['rolled_back']} rolled back, {replayed['failed']} failed"
+            ))
+        host, port = scheduler.address
+        self.stdout.write(self.style.HTTP_INFO(
+            f"Settlement worker {shard + 1}/{scheduler.shard[1]} listening on {host}:{port}, "
+            f"{count} active investments scheduled"
+        ))
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Settlement worker stopped"))
+        finally:
+            scheduler.close()
+
+    def run_all(self, shards, resync_every):
+        # Children must not inherit the parent's DB connection
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=run_shard, args=(shard, resync_every), name=f"settlement-{shard}")
+            for shard in range(shards)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(self.style.HTTP_INFO(f"Started {shards} settlement worker processes"))
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
+            self.stdout.write(self.style.WARNING("Settlement workers stopped"))
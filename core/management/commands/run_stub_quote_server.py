@@ -0,0 +1,23 @@
+# management/commands/run_stub_quote_server.py
+from django.core.management.base import BaseCommand
+
+from core.services.quote_server import StubQuoteServer
+
+
+class Command(BaseCommand):
+    help = 'Run a local stand-in market-data API for the HTTP quote provider'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        server = StubQuoteServer(options['host'], options['port'])
+        self.stdout.write(self.style.HTTP_INFO(f"Stub quote server listening on {server.url}"))
+        self.stdout.write("Set MARKET_DATA_PROVIDER=http and MARKET_DATA_URL to this address to use it.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Stub quote server stopped"))
+        finally:
+            server.server_close()
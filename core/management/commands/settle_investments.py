@@ -0,0 +1,35 @@
+# management/commands/settle_investments.py
+from django.core.management.base import BaseCommand
+
+from core.services.settlement import InvestmentSettlement
+
+
+class Command(BaseCommand):
+    help = 'Settle every matured investment in bulk chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=InvestmentSettlement.CHUNK_SIZE,
+            help='Investments settled per atomic block',
+        )
+        parser.add_argument('--limit', type=int, help='Stop after this many investments')
+
+    def handle(self, *args, **options):
+        replayed = InvestmentSettlement.replay(chunk_size=options['chunk_size'])
+        if any(replayed.values()):
+            self.stdout.write(self.style.WARNING(
+                f"Replayed pending settlements: {replayed['applied']} applied, "
+                f"{replayed['rolled_back']} rolled back, {replayed['failed']} failed"
+            ))
+
+        stats = InvestmentSettlement.settle_due(
+            chunk_size=options['chunk_size'], limit=options['limit']
+        )
+
+        if stats['settled']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Settled {stats['settled']} investments in {stats['chunks']} chunk(s), "
+                f"total profit {stats['profit']}"
+            ))
+        else:
+            self.stdout.write(self.style.WARNING("No matured investments to settle"))
@@ -0,0 +1,92 @@
+# core/middleware.py
+from decimal import Decimal
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import cached_property
+
+from core.models import Wallet
+from core.utils.currency import BASE_CURRENCY, converter_for, resolve_currency
+
+WALLET_DEFAULTS = {
+    'available_balance': Decimal('0.00'),
+    'locked_balance': Decimal('0.00'),
+    'bonus_balance': Decimal('0.00'),
+    'bonus_claimed': Decimal('0.00'),
+    'currency': BASE_CURRENCY,
+}
+
+
+class RequestAccount:
+    """
+    The current user's wallet and display currency, resolved lazily and at
+    most once per request. Views, forms and the currency context processor
+    all read from here instead of fetching the wallet again.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    @cached_property
+    def _wallet(self):
+        user = self.request.user
+        if not user.is_authenticated:
+            return None, False
+        return Wallet.objects.get_or_create(user=user, defaults=WALLET_DEFAULTS)
+
+    @property
+    def wallet(self):
+        """The user's wallet (created on first access), None for anonymous users"""
+        return self._wallet[0]
+
+    @property
+    def wallet_created(self):
+        """True if the wallet was created during this request"""
+        return self._wallet[1]
+
+    @cached_property
+    def currency(self):
+        """Wallet currency for users, cookie for visitors, USD as fallback"""
+        if self.wallet is not None:
+            code = self.wallet.currency or BASE_CURRENCY
+        else:
+            code = self.request.COOKIES.get('currency', BASE_CURRENCY)
+        return resolve_currency(code)
+
+    @property
+    def converter(self):
+        """CurrencyConverter for the display currency"""
+        return converter_for(self.currency)
+
+    def refresh(self):
+        """Forget the cached wallet/currency (after changing the wallet row)"""
+        self.__dict__.pop('_wallet', None)
+        self.__dict__.pop('currency', None)
+
+
+class AccountMiddleware:
+    """
+    Attach ``request.account`` (a RequestAccount); needs AuthenticationMiddleware first.
+
+    Works in both modes, so under ASGI async views (the price stream) aren't
+    pushed through sync_to_async on its account. Attaching does no I/O; the
+    wallet is only fetched when a (sync) view reads it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request.account = RequestAccount(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.account = RequestAccount(request)
+        return await self.get_response(request)
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceCandle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interval', models.CharField(choices=[('1m', '1 Minute'), ('5m', '5 Minutes'), ('1h', '1 Hour'), ('1d', '1 Day')], max_length=2)),
+                ('bucket_start', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=6, max_digits=20)),
+                ('high', models.DecimalField(decimal_places=6, max_digits=20)),
+                ('low', models.DecimalField(decimal_places=6, max_digits=20)),
+                ('close', models.DecimalField(decimal_places=6, max_digits=20)),
+                ('tick_count', models.PositiveIntegerField(default=0)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candles', to='core.asset')),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'unique_together': {('asset', 'interval', 'bucket_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceTick',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=6, max_digits=20)),
+                ('timestamp', models.DateTimeField()),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticks', to='core.asset')),
+            ],
+            options={
+                'ordering': ['timestamp'],
+                'indexes': [models.Index(fields=['asset', 'timestamp'], name='core_pricet_asset_i_15810d_idx'), models.Index(fields=['timestamp'], name='core_pricet_timesta_b21c13_idx')],
+            },
+        ),
+    ]
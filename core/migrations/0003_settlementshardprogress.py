@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_pricecandle_pricetick'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SettlementShardProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveIntegerField()),
+                ('shard_count', models.PositiveIntegerField()),
+                ('hostname', models.CharField(blank=True, max_length=255)),
+                ('pid', models.PositiveIntegerField(blank=True, null=True)),
+                ('scheduled', models.PositiveIntegerField(default=0)),
+                ('settled_total', models.PositiveBigIntegerField(default=0)),
+                ('profit_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('last_settled_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('heartbeat_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['shard_count', 'shard'],
+                'unique_together': {('shard', 'shard_count')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_settlementshardprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SettlementJournal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('principal', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('profit', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('state', models.CharField(choices=[('pending', 'Pending'), ('applied', 'Applied'), ('rolled_back', 'Rolled back')], db_index=True, default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('investment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='settlement', to='core.investment')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_settlementjournal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('invested_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('completed_invested', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('active_invested', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('active_count', models.IntegerField(default=0)),
+                ('total_profit', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('total_loss', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='portfolio_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Portfolio stats',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_transactionarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FxRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency_code', models.CharField(max_length=10)),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18)),
+                ('version', models.BigIntegerField()),
+                ('source', models.CharField(max_length=20)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-fetched_at'],
+                'indexes': [models.Index(fields=['currency_code', '-fetched_at'], name='fx_code_fetched_idx')],
+                'constraints': [models.UniqueConstraint(fields=('version', 'currency_code'), name='fx_version_code_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:00
+
+import core.money
+from django.db import migrations
+
+BALANCES = ['available_balance', 'locked_balance', 'bonus_balance', 'bonus_claimed']
+BATCH_SIZE = 1000
+
+
+def copy_balances(apps, source, target):
+    Wallet = apps.get_model('core', 'Wallet')
+    batch = []
+    for wallet in Wallet.objects.only('id', *source).iterator(chunk_size=BATCH_SIZE):
+        for old, new in zip(source, target):
+            setattr(wallet, new, getattr(wallet, old))
+        batch.append(wallet)
+        if len(batch) == BATCH_SIZE:
+            Wallet.objects.bulk_update(batch, target)
+            batch = []
+    if batch:
+        Wallet.objects.bulk_update(batch, target)
+
+
+def to_micros(apps, schema_editor):
+    copy_balances(apps, BALANCES, [f'{name}_micros' for name in BALANCES])
+
+
+def from_micros(apps, schema_editor):
+    copy_balances(apps, [f'{name}_micros' for name in BALANCES], BALANCES)
+
+
+class Migration(migrations.Migration):
+    """Wallet balances: DECIMAL → BIGINT micro-units (add, copy, drop, rename)"""
+
+    dependencies = [
+        ('core', '0008_fxrate'),
+    ]
+
+    operations = [
+        *[
+            migrations.AddField(
+                model_name='wallet',
+                name=f'{name}_micros',
+                field=core.money.MicroMoneyField(default=0),
+            )
+            for name in BALANCES
+        ],
+        migrations.RunPython(to_micros, from_micros),
+        *[migrations.RemoveField(model_name='wallet', name=name) for name in BALANCES],
+        *[
+            migrations.RenameField(model_name='wallet', old_name=f'{name}_micros', new_name=name)
+            for name in BALANCES
+        ],
+    ]
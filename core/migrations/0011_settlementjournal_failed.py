@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_referenceworkerlease'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='settlementjournal',
+            name='state',
+            field=models.CharField(choices=[('pending', 'Pending'), ('applied', 'Applied'), ('rolled_back', 'Rolled back'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20),
+        ),
+    ]
@@ -1,10 +1,12 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 from decimal import Decimal
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 import uuid
 
+from core.money import MicroMoneyField
+from core.utils.references import transaction_references
 from pesaprime import settings
 
 class User(AbstractUser):
@@ -67,12 +69,38 @@ class Currency(models.Model):
         return f"{self.code} - {self.name}"
     
 
+class FxRate(models.Model):
+    """
+    Rate history (1 USD = rate units of currency_code), appended in bulk by
+    refresh_fx_rates. Every row of one refresh shares its version.
+    """
+    currency_code = models.CharField(max_length=10)
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+    version = models.BigIntegerField()
+    source = models.CharField(max_length=20)
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-fetched_at']
+        constraints = [
+            models.UniqueConstraint(fields=['version', 'currency_code'], name='fx_version_code_uniq'),
+        ]
+        indexes = [
+            # rate_at(): latest row for a code at or before a moment
+            models.Index(fields=['currency_code', '-fetched_at'], name='fx_code_fetched_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.currency_code} {self.rate} @ {self.fetched_at}"
+
+
 class Wallet(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='wallet')
-    available_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
-    locked_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
-    bonus_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
-    bonus_claimed = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Integer micro-units in the database, Decimal on the model (see core/money.py)
+    available_balance = MicroMoneyField(default=0)
+    locked_balance = MicroMoneyField(default=0)
+    bonus_balance = MicroMoneyField(default=0)
+    bonus_claimed = MicroMoneyField(default=0)
     currency = models.CharField(max_length=10, default='USD')  # Add this for currency preference
 
     def __str__(self):
@@ -144,16 +172,64 @@ class Transaction(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of a user's history on (created_at, id)
+            models.Index(fields=['user', '-created_at', '-id'], name='tx_user_created_idx'),
+            models.Index(fields=['user', 'transaction_type', '-created_at', '-id'], name='tx_user_type_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.transaction_type} | {self.amount} | {self.status}"
     
     def save(self, *args, **kwargs):
         if not self.reference:
-            self.reference = f"TX{uuid.uuid4().hex[:8].upper()}"
+            self.reference = self.generate_reference()
         super().save(*args, **kwargs)
+
+    @classmethod
+    def generate_reference(cls):
+        """Unique reference (bulk_create skips save(), so set it explicitly there)"""
+        return transaction_references.next()
+
+    @classmethod
+    def generate_references(cls, count):
+        """References for a bulk insert, reserved in one go"""
+        return transaction_references.allocate(count)
         
 
+class TransactionArchive(models.Model):
+    """
+    Cold tier of Transaction: settled rows past the archive horizon are moved
+    here by archive_transactions, keeping their original id and timestamps
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_transactions')
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='archived_transactions')
+
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPE_CHOICES)
+    payment_method = models.CharField(max_length=20, choices=Transaction.PAYMENT_METHOD_CHOICES)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+
+    status = models.CharField(max_length=20, choices=Transaction.STATUS_CHOICES)
+
+    reference = models.CharField(max_length=120, unique=True, blank=True)
+    description = models.TextField(blank=True)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='txa_user_created_idx'),
+            models.Index(fields=['created_at'], name='txa_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction_type} | {self.amount} | {self.status} (archived)"
+
+
 class Asset(models.Model):
     CATEGORY_CHOICES = [
         ('crypto', 'Cryptocurrency'),
@@ -227,6 +303,20 @@ class Asset(models.Model):
     def __str__(self):
         return f"{self.name} ({self.symbol})"
     
+    # Fields written on every price tick (used by bulk_update in the batch engine)
+    PRICE_FIELDS = ['current_price', 'previous_price', 'change_percentage', 'last_updated']
+
+    # Prices older than this are considered stale
+    STALE_AFTER = timedelta(minutes=5)
+
+    # Per-category tick cadence (falls back to STALE_AFTER)
+    UPDATE_INTERVALS = {
+        'crypto': timedelta(seconds=30),
+        'forex': timedelta(seconds=60),
+        'futures': timedelta(seconds=60),
+        'stock': timedelta(seconds=120),
+    }
+
     def update_price(self, new_price):
         """Update price and calculate changes"""
         if self.current_price and new_price:
@@ -236,13 +326,29 @@ class Asset(models.Model):
         elif new_price:
             self.current_price = new_price
         self.save()
-    
+
+    @classmethod
+    def update_interval(cls, category):
+        """How often assets in a category should be re-priced"""
+        return cls.UPDATE_INTERVALS.get(category, cls.STALE_AFTER)
+
     def needs_update(self):
-        """Check if price needs update (older than 5 minutes)"""
+        """Check if price is older than its category's update interval"""
         if not self.last_updated:
             return True
-        update_threshold = datetime.now() - timedelta(minutes=5)  # FIXED: Use timedelta
+        update_threshold = timezone.now() - self.update_interval(self.category)
         return self.last_updated < update_threshold
+
+    @classmethod
+    def stale_filter(cls):
+        """Q object matching needs_update() for every category"""
+        now = timezone.now()
+        stale = models.Q(last_updated__lt=now - cls.STALE_AFTER) & ~models.Q(
+            category__in=list(cls.UPDATE_INTERVALS)
+        )
+        for category, interval in cls.UPDATE_INTERVALS.items():
+            stale |= models.Q(category=category, last_updated__lt=now - interval)
+        return stale
     
     def get_icon_url(self):
         """Get icon URL or default"""
@@ -259,6 +365,65 @@ class Asset(models.Model):
     
 
 
+class PriceTick(models.Model):
+    """Append-only price history, written in bulk by the price updater"""
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='ticks')
+    price = models.DecimalField(max_digits=20, decimal_places=6)
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['asset', 'timestamp']),
+            models.Index(fields=['timestamp']),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} @ {self.timestamp}: {self.price}"
+
+
+class PriceCandle(models.Model):
+    """OHLC rollup of PriceTick rows, maintained incrementally per interval"""
+    INTERVAL_CHOICES = [
+        ('1m', '1 Minute'),
+        ('5m', '5 Minutes'),
+        ('1h', '1 Hour'),
+        ('1d', '1 Day'),
+    ]
+
+    # Bucket width in seconds for each interval
+    INTERVAL_SECONDS = {
+        '1m': 60,
+        '5m': 5 * 60,
+        '1h': 60 * 60,
+        '1d': 24 * 60 * 60,
+    }
+
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='candles')
+    interval = models.CharField(max_length=2, choices=INTERVAL_CHOICES)
+    bucket_start = models.DateTimeField()
+
+    open = models.DecimalField(max_digits=20, decimal_places=6)
+    high = models.DecimalField(max_digits=20, decimal_places=6)
+    low = models.DecimalField(max_digits=20, decimal_places=6)
+    close = models.DecimalField(max_digits=20, decimal_places=6)
+    tick_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['bucket_start']
+        unique_together = ['asset', 'interval', 'bucket_start']
+
+    def __str__(self):
+        return f"{self.asset_id} {self.interval} {self.bucket_start}"
+
+    @property
+    def change_percentage(self):
+        """Open-to-close change within the bucket"""
+        if not self.open:
+            return Decimal('0')
+        return ((self.close - self.open) / self.open) * 100
+
+
 class Investment(models.Model):
     STATUS_CHOICES = [
         ('active', 'Active'),
@@ -326,44 +491,118 @@ class Investment(models.Model):
         """Complete the investment and calculate actual profit"""
         if self.status != 'active':
             return
-        
-        # Simulate profit/loss based on market conditions
-        import random
-        from decimal import Decimal
-        
-        # Base profit based on expected return
-        base_profit = self.expected_profit
-        
-        # Add some randomness (±20%)
-        random_factor = Decimal(str(random.uniform(0.8, 1.2)))
-        self.actual_profit_loss = base_profit * random_factor
-        
-        self.status = 'completed'
-        self.completed_at = timezone.now()
-        self.save()
-        
-        # Update user's wallet
-        wallet = self.user.wallet
-        total_amount = self.invested_amount + self.actual_profit_loss
-        
-        wallet.locked_balance -= self.invested_amount
-        wallet.available_balance += total_amount
-        wallet.save()
-        
-        # Create transaction record
-        
-        Transaction.objects.create(
-            user=self.user,
-            wallet=wallet,
-            transaction_type='profit',
-            payment_method='system',
-            amount=self.actual_profit_loss,
-            status='completed',
-            description=f"Profit from {self.asset.name} investment"
-        )
-        
+
+        # Journaled bulk settlement path, so a crash can never half-apply it
+        from core.services.settlement import InvestmentSettlement
+
+        InvestmentSettlement.settle_chunk([self.id], max(timezone.now(), self.end_time))
+        self.refresh_from_db()
         return self.actual_profit_loss
-    
+
+
+class SettlementJournal(models.Model):
+    """Write-ahead record of one investment settlement: intent first, then outcome"""
+    PENDING = 'pending'
+    APPLIED = 'applied'
+    ROLLED_BACK = 'rolled_back'
+    FAILED = 'failed'  # dead letter: can't be applied (e.g. no wallet); set back to pending once fixed
+
+    STATE_CHOICES = [
+        (PENDING, 'Pending'),
+        (APPLIED, 'Applied'),
+        (ROLLED_BACK, 'Rolled back'),
+        (FAILED, 'Failed'),
+    ]
+
+    investment = models.OneToOneField('core.Investment', on_delete=models.CASCADE, related_name='settlement')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+
+    principal = models.DecimalField(max_digits=20, decimal_places=2)
+    profit = models.DecimalField(max_digits=20, decimal_places=2)
+
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default=PENDING, db_index=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Settlement {self.investment_id} ({self.state})"
+
+
+class PortfolioStats(models.Model):
+    """
+    Materialized per-user investment totals (kept up to date incrementally by
+    investment creation and settlement; rebuild with rebuild_portfolio_stats)
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='portfolio_stats')
+
+    invested_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    completed_invested = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    active_invested = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    active_count = models.IntegerField(default=0)
+
+    total_profit = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_loss = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Portfolio stats'
+
+    def __str__(self):
+        return f"{self.user} portfolio stats"
+
+    @property
+    def net_pl(self):
+        return self.total_profit + self.total_loss
+
+    @property
+    def net_pl_percentage(self):
+        """Net P/L as a percentage of the capital in finished investments"""
+        if self.completed_invested > 0:
+            return (self.net_pl / self.completed_invested) * 100
+        return 0
+
+
+class SettlementShardProgress(models.Model):
+    """Heartbeat/progress row for one settlement worker shard (monitoring only)"""
+    shard = models.PositiveIntegerField()
+    shard_count = models.PositiveIntegerField()
+
+    hostname = models.CharField(max_length=255, blank=True)
+    pid = models.PositiveIntegerField(null=True, blank=True)
+
+    scheduled = models.PositiveIntegerField(default=0)
+    settled_total = models.PositiveBigIntegerField(default=0)
+    profit_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    last_settled_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    heartbeat_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['shard', 'shard_count']
+        ordering = ['shard_count', 'shard']
+
+    def __str__(self):
+        return f"Settlement shard {self.shard}/{self.shard_count}"
+
+
+class ReferenceWorkerLease(models.Model):
+    """
+    Worker id (0-1023) leased by one running process for its transaction
+    references (see core/utils/references.py). A lease past expires_at is
+    free for the next process to take.
+    """
+    worker_id = models.PositiveSmallIntegerField(primary_key=True)
+    owner = models.CharField(max_length=100)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Worker {self.worker_id} ({self.owner})"
 
 
 class Bonus(models.Model):
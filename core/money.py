@@ -0,0 +1,110 @@
+# core/money.py
+from decimal import ROUND_HALF_EVEN, Decimal
+
+from django import forms
+from django.core import exceptions
+from django.db import models
+
+MICRO_PLACES = 6
+MICROS = 10 ** MICRO_PLACES  # micro-units per dollar
+CENT_MICROS = MICROS // 100
+MICRO = Decimal(1).scaleb(-MICRO_PLACES)
+
+
+def to_micros(value):
+    """
+    Exact amount → integer micro-units. ints count whole units; Decimals,
+    floats and strings are rounded half-even to the micro (the same rule
+    Decimal.quantize applies by default).
+    """
+    if value is None:
+        return None
+    if isinstance(value, int):  # includes bool
+        return int(value) * MICROS
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return int(value.quantize(MICRO, rounding=ROUND_HALF_EVEN).scaleb(MICRO_PLACES))
+
+
+def from_micros(micros, places=2):
+    """
+    Integer micro-units → Decimal, shown with ``places`` decimals when that
+    is exact (balances are whole cents) and with full precision otherwise.
+    """
+    if micros is None:
+        return None
+    # round(): aggregates such as Avg hand back floats with fractional micros
+    exact = Decimal(round(micros)).scaleb(-MICRO_PLACES)
+    shown = exact.quantize(Decimal(1).scaleb(-places))
+    return shown if shown == exact else exact
+
+
+def _div_half_even(numerator, denominator):
+    quotient, remainder = divmod(numerator, denominator)
+    if remainder * 2 > denominator or (remainder * 2 == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def round_micros(micros, places=2):
+    """Round integer micro-units half-even to ``places`` decimals, staying in micros"""
+    step = 10 ** (MICRO_PLACES - places)
+    return _div_half_even(micros, step) * step
+
+
+def mul_micros(micros, factor_micros, places=MICRO_PLACES):
+    """micros × (factor_micros / 1e6), rounded once (half-even) to ``places``, in micros"""
+    step = 10 ** (MICRO_PLACES - places)
+    return _div_half_even(micros * factor_micros, MICROS * step) * step
+
+
+class MicroMoneyField(models.BigIntegerField):
+    """
+    Money stored as integer micro-units (1 USD = 1_000_000) in a BIGINT.
+
+    Model attributes, lookups and forms still use Decimal (``1234.50``), so
+    templates and views are unchanged, while the database does integer
+    arithmetic. Raw expressions are in micros: pass ints from to_micros()
+    to F() updates, e.g. ``F('available_balance') + to_micros(amount)``.
+
+    Sum, Min and Max keep this field as their output and return Decimals.
+    Avg resolves integer inputs to FloatField, i.e. a float in micros; use
+    ``Avg('available_balance', output_field=MicroMoneyField())`` instead.
+    """
+
+    description = "Money in integer micro-units"
+
+    def __init__(self, *args, decimal_places=2, **kwargs):
+        self.decimal_places = decimal_places
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.decimal_places != 2:
+            kwargs['decimal_places'] = self.decimal_places
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        return from_micros(value, self.decimal_places)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Decimal):
+            return value
+        try:
+            return Decimal(str(value))
+        except ArithmeticError:
+            raise exceptions.ValidationError(
+                self.error_messages['invalid'], code='invalid', params={'value': value}
+            )
+
+    def get_prep_value(self, value):
+        if hasattr(value, 'resolve_expression'):
+            return value
+        return to_micros(value)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            'form_class': forms.DecimalField,
+            'decimal_places': self.decimal_places,
+            **kwargs,
+        })
@@ -0,0 +1,40 @@
+# core/services/asset_facets.py
+from django.core.cache import cache
+from django.db.models import Count
+
+from core.models import Asset
+
+FACETS_CACHE_KEY = 'assets:category_facets'
+
+# Safety net for changes that bypass signals (e.g. QuerySet.update) and for
+# other processes when the cache is per-process (LocMem, the default)
+FACETS_CACHE_TIMEOUT = 5 * 60
+
+
+def category_facets():
+    """
+    Category filter entries with active-asset counts, from one grouped query.
+    Categories come from Asset.CATEGORY_CHOICES; the result is cached until an
+    asset is created, deleted, (de)activated or recategorized.
+    """
+    facets = cache.get(FACETS_CACHE_KEY)
+    if facets is not None:
+        return facets
+
+    counts = dict(
+        Asset.objects.filter(is_active=True)
+        .order_by()
+        .values_list('category')
+        .annotate(total=Count('id'))
+    )
+
+    facets = [{'id': 'all', 'name': 'All Assets', 'count': sum(counts.values())}]
+    for value, label in Asset.CATEGORY_CHOICES:
+        facets.append({'id': value, 'name': label, 'count': counts.get(value, 0)})
+
+    cache.set(FACETS_CACHE_KEY, facets, FACETS_CACHE_TIMEOUT)
+    return facets
+
+
+def invalidate_category_facets():
+    cache.delete(FACETS_CACHE_KEY)
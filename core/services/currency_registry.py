@@ -0,0 +1,78 @@
+# core/services/currency_registry.py
+import threading
+import time
+
+from django.core.cache import cache
+
+from core.models import Currency
+
+VERSION_KEY = 'currencies:version'
+
+
+class CurrencyRegistry:
+    """
+    Process-local copy of the (small) Currency table.
+
+    Loaded once, then revalidated at most every ``check_every`` seconds by
+    comparing a version stamp kept in the shared cache. Currency saves and
+    deletes (and bulk rate refreshes) bump the stamp, so every worker reloads
+    within about a second of a change, and steady-state lookups cost no
+    queries. The stamp only reaches other processes through a shared cache
+    backend, so the table is also reloaded once it is ``max_age`` seconds
+    old (bounding staleness under the per-process LocMem default).
+    Returned Currency instances are shared: treat them as read-only.
+    """
+
+    def __init__(self, check_every=1.0, max_age=60.0, clock=time.monotonic):
+        self.check_every = check_every
+        self.max_age = max_age
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._by_code = None
+        self._active = []
+        self._version = None
+        self._next_check = 0
+        self._expires = 0
+
+    @staticmethod
+    def bump(version=None):
+        """Invalidate every process's registry (call after changing currencies)"""
+        cache.set(VERSION_KEY, version or time.time_ns(), None)
+
+    @staticmethod
+    def version():
+        return cache.get(VERSION_KEY)
+
+    def _current(self):
+        now = self.clock()
+        if self._by_code is not None and now < self._next_check:
+            return self._by_code
+
+        version = cache.get(VERSION_KEY)
+        with self._lock:
+            if self._by_code is None or version != self._version or now >= self._expires:
+                self.reload(version)
+                self._expires = now + self.max_age
+            self._next_check = now + self.check_every
+        return self._by_code
+
+    def reload(self, version=None):
+        currencies = list(Currency.objects.order_by('pk'))
+        self._active = [currency for currency in currencies if currency.is_active]
+        self._by_code = {currency.code: currency for currency in currencies}
+        self._version = version
+
+    def get(self, code, active_only=True):
+        currency = self._current().get(code)
+        if currency is None or (active_only and not currency.is_active):
+            return None
+        return currency
+
+    def active(self):
+        """Active currencies in table order (for currency pickers)"""
+        self._current()
+        return self._active
+
+
+# Shared per-process registry
+currency_registry = CurrencyRegistry()
@@ -0,0 +1,146 @@
+# core/services/exports.py
+import csv
+import heapq
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from uuid import UUID
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.models import Investment, Transaction, TransactionArchive
+from core.services.fx_rates import RateTimeline
+from core.utils.currency import BASE_CURRENCY
+
+EXPORT_CHUNK_SIZE = 2000
+LINES_PER_CHUNK = 500
+
+# kind -> (models merged in date order, date field used for range filters, columns)
+EXPORTS = {
+    'transactions': ((Transaction, TransactionArchive), 'created_at', (
+        'reference', 'transaction_type', 'payment_method', 'amount',
+        'status', 'description', 'created_at',
+    )),
+    'investments': ((Investment,), 'start_time', (
+        'id', 'asset__symbol', 'invested_amount', 'duration_hours', 'expected_return_rate',
+        'actual_profit_loss', 'status', 'start_time', 'end_time', 'completed_at',
+    )),
+}
+
+# USD columns that get a converted twin when an export asks for another currency
+MONEY_COLUMNS = {
+    'transactions': ('amount',),
+    'investments': ('invested_amount', 'actual_profit_loss'),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line straight back"""
+
+    def write(self, value):
+        return value
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+def parse_range(start=None, end=None):
+    """Inclusive YYYY-MM-DD bounds -> aware [start, end) datetimes; raises ValueError"""
+    bounds = []
+    for value, offset in ((start, 0), (end, 1)):
+        if not value:
+            bounds.append(None)
+            continue
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+        bounds.append(timezone.make_aware(datetime.combine(day + timedelta(days=offset), time.min)))
+    return tuple(bounds)
+
+
+def export_rows(kind, user=None, start=None, end=None, currency=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    (columns, row iterator) for an export. Rows are values_list tuples pulled
+    through .iterator(chunk_size), so memory stays flat however many there are;
+    multi-tier exports (hot + archived transactions) are merged by date.
+    Exports across all users (user=None) get the owner's username column.
+    A non-USD ``currency`` code adds the rate in force at each row's date and
+    the money columns converted at that rate.
+    """
+    models, date_field, columns = EXPORTS[kind]
+    if user is None:
+        columns = ('user__username', *columns)
+
+    tiers = []
+    for model in models:
+        rows = model.objects.all()
+        if user is not None:
+            rows = rows.filter(user=user)
+        if start:
+            rows = rows.filter(**{f'{date_field}__gte': start})
+        if end:
+            rows = rows.filter(**{f'{date_field}__lt': end})
+        rows = rows.order_by(date_field, 'pk').values_list(*columns)
+        tiers.append(rows.iterator(chunk_size=chunk_size))
+
+    date_index = columns.index(date_field)
+    if len(tiers) == 1:
+        rows = tiers[0]
+    else:
+        rows = heapq.merge(*tiers, key=lambda row: row[date_index])
+
+    if currency and currency != BASE_CURRENCY:
+        money = [columns.index(column) for column in MONEY_COLUMNS[kind]]
+        converted = tuple(f"{columns[index]}_{currency.lower()}" for index in money)
+        rows = _converted(rows, RateTimeline(currency), date_index, money)
+        columns = (*columns, 'fx_rate', *converted)
+    return columns, rows
+
+
+def _converted(rows, rates, date_index, money):
+    """Append each row's historical rate and its money columns at that rate"""
+    for row in rows:
+        when = row[date_index]
+        yield (*row, rates.rate_at(when), *(rates.convert(row[index], when) for index in money))
+
+
+def _batched(lines, size=LINES_PER_CHUNK):
+    """Join lines into larger chunks so the server isn't writing once per row"""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def stream_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    yield from _batched(writer.writerow([_plain(value) for value in row]) for row in rows)
+
+
+def stream_jsonl(columns, rows):
+    yield from _batched(
+        json.dumps({column: _plain(value) for column, value in zip(columns, row)}) + '\n'
+        for row in rows
+    )
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'jsonl': stream_jsonl,
+}
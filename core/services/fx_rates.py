@@ -0,0 +1,254 @@
+# core/services/fx_rates.py
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from decimal import Decimal
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Currency, FxRate
+from core.services.currency_registry import CurrencyRegistry, currency_registry
+from core.utils.currency import BASE_CURRENCY, CENT
+
+logger = logging.getLogger(__name__)
+
+RATE_PLACES = Decimal('0.00000001')  # FxRate.rate
+LIVE_PLACES = Decimal('0.0001')  # Currency.exchange_rate
+
+
+class FxRateProvider(ABC):
+    """
+    Source of exchange rates. get_rates() takes currency codes and returns
+    {code: Decimal} (units per 1 USD) for as many of them as it could price.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def get_rates(self, codes):
+        """{code: positive Decimal rate}; codes it can't price are left out"""
+
+
+class StubFxRateProvider(FxRateProvider):
+    """Local stand-in: a small random walk around the current live rates"""
+
+    name = 'stub'
+
+    def __init__(self, volatility=0.002):
+        self.volatility = volatility
+
+    def get_rates(self, codes):
+        current = dict(Currency.objects.filter(code__in=codes).values_list('code', 'exchange_rate'))
+        return {
+            code: (rate * Decimal(str(1 + random.uniform(-self.volatility, self.volatility)))).quantize(RATE_PLACES)
+            for code, rate in current.items()
+            if rate
+        }
+
+
+class HTTPFxRateProvider(FxRateProvider):
+    """
+    Rates from an HTTP API answering ``GET {url}/rates?base=USD&symbols=A,B``
+    with ``{"rates": {"A": 1.23, ...}}``. One request per refresh over a
+    keep-alive requests.Session.
+    """
+
+    name = 'http'
+
+    def __init__(self, url, timeout=5, api_key=None):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'Accept': 'application/json'})
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+
+    def get_rates(self, codes):
+        try:
+            response = self.session.get(
+                f"{self.url}/rates",
+                params={'base': BASE_CURRENCY, 'symbols': ','.join(codes)},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            rates = response.json()['rates']
+            return {code.upper(): rate for code, rate in self._valid(rates.items())}
+        except (requests.RequestException, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"FX rate API failed: {str(e)}")
+            return {}
+
+    @staticmethod
+    def _valid(items):
+        """Parsed (code, rate) pairs, skipping anything that isn't a finite positive number"""
+        for code, raw in items:
+            try:
+                rate = Decimal(str(raw))
+                if rate.is_finite() and rate > 0:
+                    rate = rate.quantize(RATE_PLACES)
+                    if rate > 0:
+                        yield code, rate
+                        continue
+            except ArithmeticError:
+                pass
+            logger.warning(f"FX rate API sent an invalid rate for {code}: {raw!r}")
+
+
+def build_fx_provider(config=None):
+    """Create a provider from an FX_RATES-style settings dict"""
+    config = config or getattr(settings, 'FX_RATES', {})
+    backend = config.get('PROVIDER', 'stub')
+
+    if backend == 'stub':
+        return StubFxRateProvider()
+    if backend == 'http':
+        return HTTPFxRateProvider(
+            url=config['URL'],
+            timeout=config.get('TIMEOUT', 5),
+            api_key=config.get('API_KEY'),
+        )
+    raise ValueError(f"Unknown FX rate provider: {backend}")
+
+
+class FxRates:
+    """
+    Rate refresh and historical lookup.
+
+    refresh() fetches every currency's rate in one provider call, appends
+    them to FxRate with one bulk insert and swaps Currency.exchange_rate
+    with one bulk UPDATE, all in a single transaction. After commit it bumps
+    the currency registry to the refresh's version, so workers move from the
+    old rate set to the new one in a single reload and a page never mixes
+    the two.
+    """
+
+    @classmethod
+    def refresh(cls, provider=None, now=None):
+        """Fetch and publish a new rate set; returns the FxRate rows written (none if the provider failed)"""
+        provider = provider or build_fx_provider()
+        now = now or timezone.now()
+        version = time.time_ns()
+
+        currencies = list(Currency.objects.exclude(code=BASE_CURRENCY))
+        rates = cls.usable(provider.get_rates([currency.code for currency in currencies]), currencies)
+        if currencies and not rates:
+            return []  # provider down: keep the live rates
+        rates[BASE_CURRENCY] = Decimal('1')
+
+        rows = [
+            FxRate(currency_code=code, rate=rate, version=version, source=provider.name, fetched_at=now)
+            for code, rate in sorted(rates.items())
+        ]
+        changed = []
+        for currency in currencies:
+            rate = rates.get(currency.code)
+            if rate is None:
+                logger.warning(f"No FX rate for {currency.code}, keeping {currency.exchange_rate}")
+                continue
+            currency.exchange_rate = rate.quantize(LIVE_PLACES)
+            changed.append(currency)
+
+        with transaction.atomic():
+            FxRate.objects.bulk_create(rows)
+            Currency.objects.bulk_update(changed, ['exchange_rate'])
+            # bulk_update sends no signals, so publish the version explicitly
+            transaction.on_commit(lambda: CurrencyRegistry.bump(version))
+
+        logger.info(f"FX rates v{version}: {len(changed)} currencies updated from {provider.name}")
+        return rows
+
+    @staticmethod
+    def usable(rates, currencies):
+        """
+        The provider's rates for the requested currencies only, without any
+        that would round to 0 as a live Currency.exchange_rate (conversions
+        divide by it)
+        """
+        requested = {currency.code for currency in currencies}
+        usable = {}
+        for code, rate in rates.items():
+            if code not in requested:
+                continue
+            if rate.quantize(LIVE_PLACES) <= 0:
+                logger.warning(f"FX rate for {code} is too small to store ({rate}), skipping it")
+                continue
+            usable[code] = rate
+        return usable
+
+    @staticmethod
+    def rate_at(code, when):
+        """USD → code rate in force at ``when`` (one indexed lookup; live rate if no history)"""
+        if code == BASE_CURRENCY:
+            return Decimal('1')
+        rate = (
+            FxRate.objects.filter(currency_code=code, fetched_at__lte=when)
+            .order_by('-fetched_at')
+            .values_list('rate', flat=True)
+            .first()
+        )
+        if rate is None:
+            rate = _live_rate(code)
+        return rate
+
+
+def _live_rate(code):
+    currency = currency_registry.get(code, active_only=False)
+    return currency.exchange_rate if currency else None
+
+
+class RateTimeline:
+    """
+    FxRates.rate_at() for many timestamps of one currency.
+
+    Each lookup also fetches when the next rate took over, and timestamps
+    inside that window reuse the rate, so a statement page or a date-ordered
+    export costs two indexed queries per refresh window it spans instead of
+    one per row.
+    """
+
+    def __init__(self, code):
+        self.code = code
+        self._rate = None
+        self._start = None  # window [start, end); None means unbounded
+        self._end = None
+        self._loaded = False
+
+    def _in_window(self, when):
+        return (
+            self._loaded
+            and (self._start is None or self._start <= when)
+            and (self._end is None or when < self._end)
+        )
+
+    def rate_at(self, when):
+        if self.code == BASE_CURRENCY:
+            return Decimal('1')
+        if self._in_window(when):
+            return self._rate
+
+        history = FxRate.objects.filter(currency_code=self.code)
+        current = (
+            history.filter(fetched_at__lte=when)
+            .order_by('-fetched_at')
+            .values_list('rate', 'fetched_at')
+            .first()
+        )
+        self._rate, self._start = current or (_live_rate(self.code), None)
+        self._end = (
+            history.filter(fetched_at__gt=when)
+            .order_by('fetched_at')
+            .values_list('fetched_at', flat=True)
+            .first()
+        )
+        self._loaded = True
+        return self._rate
+
+    def convert(self, amount, when):
+        """USD ``amount`` in this currency at the rate in force at ``when``, to the cent"""
+        rate = self.rate_at(when)
+        if amount is None or rate is None:
+            return None
+        return (amount * rate).quantize(CENT)
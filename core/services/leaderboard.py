@@ -0,0 +1,88 @@
+# core/services/leaderboard.py
+import heapq
+from collections import defaultdict
+
+LEADERBOARD_SIZE = 5
+
+SIDES = {
+    'gainers': heapq.nlargest,
+    'losers': heapq.nsmallest,
+}
+
+
+def _entry(asset_id, quote):
+    return float(quote['change']), asset_id
+
+
+def build_leaderboards(quotes, size=LEADERBOARD_SIZE):
+    """
+    Top gainers/losers per category (plus 'all') from a quote snapshot map.
+    Uses bounded heaps (O(U log size)); a reader just takes the
+    precomputed id lists. Used for full publishes; per-tick publishes go
+    through update_leaderboards().
+    """
+    ranked = defaultdict(list)
+    for asset_id, quote in quotes.items():
+        entry = _entry(asset_id, quote)
+        ranked[quote['category']].append(entry)
+        ranked['all'].append(entry)
+
+    return {
+        category: {side: [asset_id for _, asset_id in pick(size, entries)] for side, pick in SIDES.items()}
+        for category, entries in ranked.items()
+    }
+
+
+def _in_category(quote, category):
+    return quote is not None and (category == 'all' or quote['category'] == category)
+
+
+def update_leaderboards(leaders, quotes, previous, size=LEADERBOARD_SIZE):
+    """
+    Patch ``leaders`` after a publish that only touched the ``previous``
+    assets ({asset_id: quote before the publish, None if new}); an id no
+    longer in ``quotes`` was removed. Boards of untouched categories are
+    kept as they are. A touched board is re-ranked from its unchanged
+    members plus the changed assets (O(changed log size)); only when a
+    leader drops out of a full board, so an asset nobody looked at could
+    take its place, is that category rebuilt from every quote.
+    """
+    touched = {'all'}
+    for asset_id, old in previous.items():
+        for quote in (old, quotes.get(asset_id)):
+            if quote is not None:
+                touched.add(quote['category'])
+
+    leaders = dict(leaders)
+    for category in touched:
+        changed = [
+            _entry(asset_id, quotes[asset_id])
+            for asset_id in previous if _in_category(quotes.get(asset_id), category)
+        ]
+        board = leaders.get(category)
+        patched = {}
+        for side, pick in SIDES.items():
+            if board is None:
+                break
+            # Rank values as they were when the board was built
+            old = [_entry(asset_id, previous.get(asset_id) or quotes[asset_id]) for asset_id in board[side]]
+            kept = [entry for entry in old if entry[1] not in previous]
+            top = pick(size, kept + changed)
+            if len(old) >= size and (len(top) < size or pick(1, [top[-1], old[-1]])[0] != top[-1]):
+                break  # the new last place is worse than the old one: a leader fell out
+            patched[side] = [asset_id for _, asset_id in top]
+        else:
+            if patched['gainers'] or patched['losers']:
+                leaders[category] = patched
+            else:
+                leaders.pop(category, None)
+            continue
+
+        entries = [_entry(asset_id, quote) for asset_id, quote in quotes.items() if _in_category(quote, category)]
+        if entries:
+            leaders[category] = {
+                side: [asset_id for _, asset_id in pick(size, entries)] for side, pick in SIDES.items()
+            }
+        else:
+            leaders.pop(category, None)
+    return leaders
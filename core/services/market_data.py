@@ -0,0 +1,215 @@
+# core/services/market_data.py
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteProvider(ABC):
+    """
+    Source of latest prices. get_quotes() takes a list of assets and returns
+    {symbol: price_in_usd} for as many of them as it could price.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def get_quotes(self, assets):
+        """{symbol: price} for the assets this provider could price"""
+
+
+class SimulatedQuoteProvider(QuoteProvider):
+    """The built-in random-walk simulator (PriceFetcher.simulate_prices)"""
+
+    name = 'simulated'
+
+    def get_quotes(self, assets):
+        from core.services.price_fetcher import PriceFetcher
+
+        symbols = [a.symbol for a in assets]
+        prices = PriceFetcher.simulate_prices(
+            symbols,
+            [a.category for a in assets],
+            [a.current_price for a in assets],
+        )
+        return dict(zip(symbols, prices.tolist()))
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing upstream for ``reset_timeout`` seconds after
+    ``failure_threshold`` consecutive failures, then lets a single trial
+    call through (half-open) before closing again. Concurrent callers are
+    refused while the trial is in flight.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial:
+                self._trial = True  # this caller is the trial
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._trial = False
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                # Trip (or re-trip after a failed half-open trial)
+                self.opened_at = self.clock()
+
+    def release(self):
+        """End a half-open trial that neither succeeded nor failed (e.g. it raised)"""
+        with self._lock:
+            self._trial = False
+
+
+class HTTPQuoteProvider(QuoteProvider):
+    """
+    Batched quotes from an HTTP market-data API.
+
+    Expects ``GET {url}/quotes?symbols=A,B,C`` to answer
+    ``{"quotes": {"A": 1.23, ...}}``. All calls share one pooled keep-alive
+    requests.Session, symbols are requested ``batch_size`` at a time, and
+    anything the upstream can't price (or any call made while the circuit
+    breaker is open) is served by the fallback provider.
+    """
+
+    name = 'http'
+
+    def __init__(self, url, timeout=5, batch_size=50, api_key=None, pool_size=4,
+                 breaker=None, fallback=None):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.breaker = breaker or CircuitBreaker()
+        self.fallback = fallback or SimulatedQuoteProvider()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Accept': 'application/json', 'Connection': 'keep-alive'})
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+
+    def fetch(self, symbols):
+        """One round trip for up to batch_size symbols"""
+        response = self.session.get(
+            f"{self.url}/quotes",
+            params={'symbols': ','.join(symbols)},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        quotes = response.json()['quotes']
+        return {symbol.upper(): price for symbol, price in self._valid(quotes.items())}
+
+    @staticmethod
+    def _valid(items):
+        """Parsed (symbol, price) pairs, skipping anything that isn't a finite positive number"""
+        for symbol, raw in items:
+            try:
+                price = float(raw)
+            except (TypeError, ValueError):
+                price = None
+            if price is not None and math.isfinite(price) and price > 0:
+                yield symbol, price
+            elif raw is not None:
+                logger.warning(f"Quote API sent an invalid price for {symbol}: {raw!r}")
+
+    def get_quotes(self, assets):
+        assets = list(assets)
+        quotes = {}
+
+        if self.breaker.allow():
+            symbols = [a.symbol.upper() for a in assets]
+            try:
+                for i in range(0, len(symbols), self.batch_size):
+                    quotes.update(self.fetch(symbols[i:i + self.batch_size]))
+                self.breaker.record_success()
+            except (requests.RequestException, ValueError, KeyError, TypeError, AttributeError) as e:
+                self.breaker.record_failure()
+                logger.warning(f"Quote API failed ({self.breaker.state}): {str(e)}")
+            finally:
+                # Anything else propagates, but must not leave a half-open trial stuck
+                self.breaker.release()
+        else:
+            logger.info("Quote API circuit open, using fallback prices")
+
+        missing = [a for a in assets if a.symbol.upper() not in quotes]
+        if missing:
+            quotes.update(self.fallback.get_quotes(missing))
+
+        return {a.symbol: quotes.get(a.symbol.upper(), quotes.get(a.symbol)) for a in assets}
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def build_quote_provider(config=None):
+    """Create a provider from a MARKET_DATA-style settings dict"""
+    config = config or getattr(settings, 'MARKET_DATA', {})
+    backend = config.get('PROVIDER', 'simulated')
+
+    if backend == 'simulated':
+        return SimulatedQuoteProvider()
+    if backend == 'http':
+        return HTTPQuoteProvider(
+            url=config['URL'],
+            timeout=config.get('TIMEOUT', 5),
+            batch_size=config.get('BATCH_SIZE', 50),
+            api_key=config.get('API_KEY'),
+            breaker=CircuitBreaker(
+                failure_threshold=config.get('FAILURE_THRESHOLD', 3),
+                reset_timeout=config.get('RESET_TIMEOUT', 30),
+            ),
+        )
+    raise ValueError(f"Unknown market data provider: {backend}")
+
+
+def get_quote_provider():
+    """Process-wide provider, so the HTTP session and breaker are shared"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = build_quote_provider()
+    return _provider
@@ -0,0 +1,246 @@
+# core/services/maturity_scheduler.py
+import heapq
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Investment, SettlementShardProgress
+from core.services.settlement import InvestmentSettlement
+
+logger = logging.getLogger(__name__)
+
+
+def shard_count():
+    return settings.SETTLEMENT_WORKER['SHARDS']
+
+
+def shard_for(user_id):
+    return user_id % shard_count()
+
+
+def worker_address(shard=0):
+    """Each shard's worker listens on PORT + shard"""
+    config = settings.SETTLEMENT_WORKER
+    return config['HOST'], config['PORT'] + shard
+
+
+def notify_maturity(investment_id, user_id, end_time, address=None):
+    """
+    Tell the owning shard's settlement worker about a new investment (one
+    UDP datagram). Best effort: if the worker is down its next resync picks
+    the row up.
+    """
+    payload = f"{investment_id} {end_time.timestamp()}".encode()
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(payload, address or worker_address(shard_for(user_id)))
+    except OSError as e:
+        logger.warning(f"Could not notify settlement worker about {investment_id}: {str(e)}")
+
+
+class MaturityScheduler:
+    """
+    Wakes the settlement engine exactly when investments mature.
+
+    Keeps a min-heap of (end_time, investment_id) for every active
+    investment, rebuilt from the DB at startup and every ``resync_every``
+    seconds as a safety net. New investments arrive as UDP datagrams from
+    invest_asset (see notify_maturity), so between maturities the worker
+    blocks on its socket instead of polling the investments table.
+
+    With SETTLEMENT_WORKER['SHARDS'] > 1, each process owns the users whose
+    id falls in its ``shard`` (user_id mod count), so workers never touch
+    the same wallet rows. Progress is reported to SettlementShardProgress.
+
+    A chunk that fails is retried with exponential backoff (RETRY_DELAY
+    doubling up to MAX_RETRY_DELAY); after MAX_ATTEMPTS its investments are
+    dropped from this worker's schedule until it restarts.
+    """
+
+    RETRY_DELAY = 1
+    MAX_RETRY_DELAY = 300
+    MAX_ATTEMPTS = 12
+
+    def __init__(self, shard=0, address=None, resync_every=None, clock=time.time):
+        self.shard = (shard, shard_count())
+        self.address = address or worker_address(shard)
+        self.resync_every = resync_every or settings.SETTLEMENT_WORKER['RESYNC_EVERY']
+        self.clock = clock
+        self.queue = []          # heap of (end_ts, investment_id)
+        self.scheduled = set()   # investment ids currently in the heap
+        self.attempts = {}       # investment id -> consecutive failed settlements
+        self.abandoned = set()   # ids that used up MAX_ATTEMPTS
+        self.next_resync = 0
+        self.sock = None
+
+    def bind(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(self.address)
+        return self.sock
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    # ---------------------------------------------------------------- schedule
+
+    def schedule(self, investment_id, end_ts):
+        investment_id = str(investment_id)
+        if investment_id not in self.scheduled and investment_id not in self.abandoned:
+            self.scheduled.add(investment_id)
+            heapq.heappush(self.queue, (end_ts, investment_id))
+
+    def start(self):
+        """Replay settlements a crash left pending, then build the schedule"""
+        replayed = InvestmentSettlement.replay(self.shard)
+        return replayed, self.load()
+
+    def load(self):
+        """Rebuild the heap from every active investment"""
+        active = InvestmentSettlement.in_shard(
+            Investment.objects.filter(status='active'), self.shard
+        ).values_list('id', 'end_time')
+        self.queue = [
+            (end_time.timestamp(), str(investment_id))
+            for investment_id, end_time in active
+            if str(investment_id) not in self.abandoned
+        ]
+        heapq.heapify(self.queue)
+        self.scheduled = {investment_id for _, investment_id in self.queue}
+        self.next_resync = self.clock() + self.resync_every
+        self.report()
+        return len(self.queue)
+
+    def pop_due(self, now):
+        due_ids = []
+        while self.queue and self.queue[0][0] <= now:
+            _, investment_id = heapq.heappop(self.queue)
+            self.scheduled.discard(investment_id)
+            due_ids.append(investment_id)
+        return due_ids
+
+    def seconds_until_due(self):
+        now = self.clock()
+        next_due = self.next_resync
+        if self.queue:
+            next_due = min(next_due, self.queue[0][0])
+        return max(0.0, next_due - now)
+
+    # ---------------------------------------------------------------- work
+
+    def settle(self):
+        """Settle everything that is due; returns the number settled"""
+        now = self.clock()
+        if now >= self.next_resync:
+            self.load()
+
+        due_ids = self.pop_due(now)
+        if not due_ids:
+            return 0
+
+        settled = 0
+        profit = Decimal('0')
+        error = ''
+        as_of = datetime.fromtimestamp(now, tz=dt_timezone.utc)
+        size = InvestmentSettlement.CHUNK_SIZE
+        for start in range(0, len(due_ids), size):
+            chunk = due_ids[start:start + size]
+            try:
+                count, total = InvestmentSettlement.settle_chunk(chunk, as_of)
+                settled += count
+                profit += total
+                for investment_id in chunk:
+                    self.attempts.pop(investment_id, None)
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Settlement failed for {len(chunk)} investments: {error}")
+                self.retry(chunk, now)
+
+        self.report(settled, profit, error)
+        return settled
+
+    def retry(self, investment_ids, now):
+        """Reschedule failed ids with exponential backoff, giving up after MAX_ATTEMPTS"""
+        given_up = 0
+        for investment_id in investment_ids:
+            attempts = self.attempts.get(investment_id, 0) + 1
+            if attempts >= self.MAX_ATTEMPTS:
+                self.attempts.pop(investment_id, None)
+                self.abandoned.add(investment_id)
+                given_up += 1
+                continue
+            self.attempts[investment_id] = attempts
+            delay = min(self.RETRY_DELAY * 2 ** (attempts - 1), self.MAX_RETRY_DELAY)
+            self.schedule(investment_id, now + delay)
+        if given_up:
+            logger.error(
+                f"Gave up on {given_up} investments after {self.MAX_ATTEMPTS} failed settlements; "
+                f"they stay active until this worker restarts or settle_investments runs"
+            )
+
+    def report(self, settled=0, profit=Decimal('0'), error=None):
+        """Heartbeat plus running totals for this shard's progress row"""
+        index, count = self.shard
+        now = timezone.now()
+        fields = {
+            'hostname': socket.gethostname(),
+            'pid': os.getpid(),
+            'scheduled': len(self.scheduled),
+            'heartbeat_at': now,
+        }
+        if error is not None:
+            fields['last_error'] = error
+
+        progress = SettlementShardProgress.objects.filter(shard=index, shard_count=count)
+        totals = {}
+        if settled:
+            totals = {
+                'settled_total': F('settled_total') + settled,
+                'profit_total': F('profit_total') + profit,
+                'last_settled_at': now,
+            }
+        if not progress.update(**fields, **totals):
+            SettlementShardProgress.objects.create(
+                shard=index, shard_count=count, settled_total=settled, profit_total=profit,
+                last_settled_at=now if settled else None, **fields,
+            )
+
+    def receive(self, timeout):
+        """Wait up to timeout for notifications and schedule them"""
+        if self.sock is None:
+            time.sleep(timeout)
+            return 0
+
+        received = 0
+        self.sock.settimeout(timeout)
+        while True:
+            try:
+                payload, _ = self.sock.recvfrom(256)
+            except (socket.timeout, BlockingIOError):
+                break
+            try:
+                investment_id, end_ts = payload.decode().split()
+                self.schedule(investment_id, float(end_ts))
+                received += 1
+            except ValueError:
+                logger.warning(f"Ignoring malformed maturity notification: {payload!r}")
+            self.sock.settimeout(0)  # drain whatever else is queued, then go back
+        return received
+
+    def run(self, max_wakeups=None):
+        """Settle and wait forever (or max_wakeups times)"""
+        if not self.next_resync:
+            self.start()
+        wakeups = 0
+        while max_wakeups is None or wakeups < max_wakeups:
+            self.settle()
+            self.receive(self.seconds_until_due())
+            wakeups += 1
@@ -0,0 +1,147 @@
+# core/services/portfolio.py
+from collections import defaultdict
+from decimal import Decimal
+import logging
+
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from core.models import Investment, PortfolioStats
+
+logger = logging.getLogger(__name__)
+
+STAT_FIELDS = (
+    'invested_total', 'completed_invested', 'active_invested',
+    'active_count', 'total_profit', 'total_loss',
+)
+
+
+def portfolio_summary(user):
+    """
+    Every portfolio total for one user in a single conditional-aggregation
+    query (SUM/COUNT ... FILTER), plus the derived net P/L.
+    """
+    summary = Investment.objects.filter(user=user).aggregate(**Portfolio.aggregates())
+    for field in STAT_FIELDS:
+        summary[field] = summary[field] or (0 if field == 'active_count' else Decimal('0'))
+    summary['net_pl'] = summary['total_profit'] + summary['total_loss']
+    return summary
+
+
+class Portfolio:
+    """
+    Per-user investment totals, read from the materialized PortfolioStats row.
+
+    Creation and settlement push deltas (one UPDATE for any number of users)
+    so a dashboard read is a single-row lookup no matter how long the user's
+    history is. Missing rows are built from the Investment table on the next
+    write; reads fall back to portfolio_summary().
+    """
+
+    @staticmethod
+    def aggregates():
+        """Conditional aggregates computing every stat in one pass"""
+        active = Q(status='active')
+        finished = ~active
+        return {
+            'invested_total': Sum('invested_amount'),
+            'completed_invested': Sum('invested_amount', filter=finished),
+            'active_invested': Sum('invested_amount', filter=active),
+            'active_count': Count('id', filter=active),
+            'total_profit': Sum('actual_profit_loss', filter=finished & Q(actual_profit_loss__gt=0)),
+            'total_loss': Sum('actual_profit_loss', filter=finished & Q(actual_profit_loss__lt=0)),
+        }
+
+    @classmethod
+    def stats_for(cls, user):
+        """
+        The user's PortfolioStats row, built from portfolio_summary() on a
+        miss (e.g. history that predates the table) so later deltas apply
+        to correct totals.
+        """
+        stats = PortfolioStats.objects.filter(user=user).first()
+        if stats is None:
+            summary = portfolio_summary(user)
+            stats = PortfolioStats(user=user, **{field: summary[field] for field in STAT_FIELDS})
+            # A concurrent writer may have created it first; keep theirs
+            PortfolioStats.objects.bulk_create([stats], ignore_conflicts=True)
+            stats = PortfolioStats.objects.get(user=user)
+        return stats
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        """Recompute stats from scratch (for the given users, or everyone with history)"""
+        investments = Investment.objects.order_by()
+        if user_ids is not None:
+            investments = investments.filter(user_id__in=user_ids)
+        totals = {
+            row.pop('user_id'): row
+            for row in investments.values('user_id').annotate(**cls.aggregates())
+        }
+
+        existing = PortfolioStats.objects.all()
+        if user_ids is not None:
+            existing = existing.filter(user_id__in=user_ids)
+        existing = {stats.user_id: stats for stats in existing}
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        for user_id in set(user_ids if user_ids is not None else totals) | set(existing):
+            row = totals.get(user_id, {})
+            stats = existing.get(user_id) or PortfolioStats(user_id=user_id)
+            for field in STAT_FIELDS:
+                setattr(stats, field, row.get(field) or 0)
+            stats.updated_at = now
+            (to_update if stats.pk else to_create).append(stats)
+
+        PortfolioStats.objects.bulk_create(to_create, batch_size=500)
+        PortfolioStats.objects.bulk_update(to_update, [*STAT_FIELDS, 'updated_at'], batch_size=500)
+        return len(to_create) + len(to_update)
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """
+        Add {user_id: {field: delta}} to the stats rows in one UPDATE. Users
+        without a row yet are rebuilt instead (which already includes the change).
+        """
+        if not deltas:
+            return
+
+        updates = {}
+        for field in STAT_FIELDS:
+            whens = [
+                When(user_id=user_id, then=Value(delta[field]))
+                for user_id, delta in deltas.items() if delta.get(field)
+            ]
+            if whens:
+                output = PortfolioStats._meta.get_field(field)
+                updates[field] = F(field) + Case(*whens, default=Value(0), output_field=output)
+
+        rows = PortfolioStats.objects.filter(user_id__in=deltas)
+        if rows.update(**updates, updated_at=timezone.now()) < len(deltas):
+            missing = set(deltas) - set(rows.values_list('user_id', flat=True))
+            cls.rebuild(missing)
+
+    @classmethod
+    def record_investment(cls, investment):
+        """A new active investment was created"""
+        cls.apply_deltas({investment.user_id: {
+            'invested_total': investment.invested_amount,
+            'active_invested': investment.invested_amount,
+            'active_count': 1,
+        }})
+
+    @classmethod
+    def record_settlements(cls, investments):
+        """Active investments just completed with their actual_profit_loss set"""
+        deltas = defaultdict(lambda: defaultdict(int))
+        for investment in investments:
+            delta = deltas[investment.user_id]
+            delta['active_invested'] -= investment.invested_amount
+            delta['active_count'] -= 1
+            delta['completed_invested'] += investment.invested_amount
+            if investment.actual_profit_loss > 0:
+                delta['total_profit'] += investment.actual_profit_loss
+            elif investment.actual_profit_loss < 0:
+                delta['total_loss'] += investment.actual_profit_loss
+        cls.apply_deltas(deltas)
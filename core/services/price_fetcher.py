@@ -1,10 +1,13 @@
 # core/services/price_fetcher.py
-import requests
 from decimal import Decimal
 import random
-from datetime import datetime,timedelta
+from datetime import datetime
 import logging
 
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
 logger = logging.getLogger(__name__)
 
 class PriceFetcher:
@@ -38,6 +41,16 @@ class PriceFetcher:
         'futures': 0.01, # 1% daily volatility
         'stock': 0.015,  # 1.5% daily volatility
     }
+
+    # Random base price ranges for symbols missing from BASE_PRICES
+    FALLBACK_PRICE_RANGES = {
+        'crypto': (0.01, 50000),
+        'forex': (0.5, 200),
+        'futures': (10, 10000),
+        'stock': (10, 1000),
+    }
+
+    MIN_PRICE = 0.000001
     
     @classmethod
     def get_realistic_price(cls, symbol, category, current_price=None):
@@ -46,14 +59,8 @@ class PriceFetcher:
         
         if base_price is None:
             # Fallback to random base price
-            if category == 'crypto':
-                base_price = random.uniform(0.01, 50000)
-            elif category == 'forex':
-                base_price = random.uniform(0.5, 200)
-            elif category == 'futures':
-                base_price = random.uniform(10, 10000)
-            else:  # stocks
-                base_price = random.uniform(10, 1000)
+            low, high = cls.FALLBACK_PRICE_RANGES.get(category, cls.FALLBACK_PRICE_RANGES['stock'])
+            base_price = random.uniform(low, high)
         
         # Use current price as base if available
         if current_price and current_price > 0:
@@ -76,8 +83,8 @@ class PriceFetcher:
         new_price = base_price * (1 + movement_factor)
         
         # Ensure minimum price
-        if new_price < 0.000001:
-            new_price = 0.000001
+        if new_price < cls.MIN_PRICE:
+            new_price = cls.MIN_PRICE
         
         return Decimal(str(round(new_price, 6)))
     
@@ -100,10 +107,100 @@ class PriceFetcher:
             return False
     
     @classmethod
-    def update_all_prices(cls):
+    def simulate_prices(cls, symbols, categories, current_prices, rng=None):
+        """
+        Vectorised get_realistic_price for a whole universe.
+        Draws every move in one NumPy pass and returns a float64 array of new prices
+        rounded to 6 decimal places, aligned with the input lists.
+        """
+        rng = rng or np.random.default_rng()
+        n = len(symbols)
+
+        current = np.array([float(p or 0) for p in current_prices], dtype=np.float64)
+        volatility = np.array(
+            [cls.VOLATILITY.get(category, 0.01) for category in categories],
+            dtype=np.float64,
+        )
+
+        # Base prices: current price if set, else the reference table, else a random fallback
+        base = current.copy()
+        for i in np.flatnonzero(base <= 0):
+            reference = cls.BASE_PRICES.get(symbols[i].upper())
+            if reference is None:
+                low, high = cls.FALLBACK_PRICE_RANGES.get(categories[i], cls.FALLBACK_PRICE_RANGES['stock'])
+                reference = rng.uniform(low, high)
+            base[i] = reference
+
+        # Time-based factor (mimics market hours)
+        hour = datetime.now().hour
+        session_factor = 1.0 if 9 <= hour <= 17 else 0.3
+
+        movement = rng.uniform(-1.0, 1.0, n) * volatility * session_factor
+        movement += rng.uniform(-0.001, 0.001, n)
+
+        new_prices = np.maximum(base * (1 + movement), cls.MIN_PRICE)
+        return np.round(new_prices, 6)
+
+    @classmethod
+    def update_prices_batch(cls, assets, provider=None):
+        """
+        Tick every asset in ``assets`` at once.
+        Prices and change percentages are computed with NumPy and written back
+        with a single bulk_update instead of one save() per row. Each tick is
+        also appended to the price history and rolled up into OHLC candles, and
+        the new quotes are published to the shared quote snapshot.
+        New prices come from the configured quote provider (simulator by default).
+        """
+        from core.models import Asset
+        from core.services.market_data import get_quote_provider
+        from core.services.price_history import PriceHistory
+        from core.services.quote_cache import quote_snapshot
+
+        assets = list(assets)
+        if not assets:
+            return 0
+
+        provider = provider or get_quote_provider()
+        quotes = provider.get_quotes(assets)
+
+        old_prices = np.array([float(a.current_price or 0) for a in assets], dtype=np.float64)
+        new_prices = np.array([quotes[a.symbol] for a in assets], dtype=np.float64)
+        new_prices = np.round(np.maximum(new_prices, cls.MIN_PRICE), 6)
+
+        has_previous = old_prices > 0
+        changes = np.zeros(len(assets), dtype=np.float64)
+        np.divide(new_prices - old_prices, old_prices, out=changes, where=has_previous)
+        changes = np.round(changes * 100, 2)
+
+        now = timezone.now()
+        for asset, new_price, change, moved in zip(
+            assets, new_prices.tolist(), changes.tolist(), has_previous.tolist()
+        ):
+            if moved:
+                asset.previous_price = asset.current_price
+                asset.change_percentage = Decimal(f"{change:.2f}")
+            asset.current_price = Decimal(f"{new_price:.6f}")
+            # bulk_update() skips auto_now, so stamp the row explicitly
+            asset.last_updated = now
+
+        with transaction.atomic():
+            Asset.objects.bulk_update(assets, Asset.PRICE_FIELDS, batch_size=500)
+            PriceHistory.record(assets, now)
+            transaction.on_commit(lambda: quote_snapshot.publish(assets))
+        logger.info(f"Batch updated {len(assets)} asset prices")
+        return len(assets)
+
+    @classmethod
+    def update_all_prices(cls, batch=True):
         """Update prices for all active assets"""
-        from assets.models import Asset
-        
+        from core.models import Asset
+
+        if batch:
+            stale_assets = Asset.objects.filter(Asset.stale_filter(), is_active=True).only(
+                'id', 'symbol', 'category', *Asset.PRICE_FIELDS
+            )
+            return cls.update_prices_batch(stale_assets)
+
         assets = Asset.objects.filter(is_active=True)
         updated_count = 0
         
@@ -112,4 +209,4 @@ class PriceFetcher:
                 if cls.update_asset_price(asset):
                     updated_count += 1
         
-        return updated_count
\ No newline at end of file
+        return updated_count
@@ -0,0 +1,91 @@
+# core/services/price_history.py
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+import logging
+
+from core.models import PriceCandle, PriceTick
+
+logger = logging.getLogger(__name__)
+
+
+class PriceHistory:
+    """Persist price ticks and keep the OHLC candle rollups up to date"""
+
+    @staticmethod
+    def bucket_start(timestamp, interval):
+        """Floor a timestamp to the start of its candle bucket (UTC aligned)"""
+        width = PriceCandle.INTERVAL_SECONDS[interval]
+        epoch = int(timestamp.timestamp())
+        return datetime.fromtimestamp(epoch - epoch % width, tz=dt_timezone.utc)
+
+    @classmethod
+    def record(cls, assets, timestamp):
+        """Append one tick per asset (bulk insert) and fold them into the candles"""
+        ticks = [
+            PriceTick(asset_id=asset.pk, price=asset.current_price, timestamp=timestamp)
+            for asset in assets
+        ]
+        if not ticks:
+            return 0
+
+        PriceTick.objects.bulk_create(ticks, batch_size=500)
+        cls.roll_up(ticks)
+        return len(ticks)
+
+    @classmethod
+    def roll_up(cls, ticks):
+        """
+        Incrementally merge ticks into every candle interval.
+        One read and at most one bulk_update + one bulk_create per interval,
+        regardless of how many ticks or assets are in the batch.
+        """
+        ticks = sorted(ticks, key=lambda t: t.timestamp)
+
+        for interval, _ in PriceCandle.INTERVAL_CHOICES:
+            grouped = defaultdict(list)
+            for tick in ticks:
+                grouped[(tick.asset_id, cls.bucket_start(tick.timestamp, interval))].append(tick.price)
+
+            existing = {
+                (candle.asset_id, candle.bucket_start): candle
+                for candle in PriceCandle.objects.filter(
+                    interval=interval,
+                    asset_id__in={asset_id for asset_id, _ in grouped},
+                    bucket_start__in={start for _, start in grouped},
+                )
+            }
+
+            to_create = []
+            to_update = []
+            for (asset_id, start), prices in grouped.items():
+                candle = existing.get((asset_id, start))
+                if candle is None:
+                    to_create.append(PriceCandle(
+                        asset_id=asset_id,
+                        interval=interval,
+                        bucket_start=start,
+                        open=prices[0],
+                        high=max(prices),
+                        low=min(prices),
+                        close=prices[-1],
+                        tick_count=len(prices),
+                    ))
+                else:
+                    candle.high = max(candle.high, *prices)
+                    candle.low = min(candle.low, *prices)
+                    candle.close = prices[-1]
+                    candle.tick_count += len(prices)
+                    to_update.append(candle)
+
+            if to_update:
+                PriceCandle.objects.bulk_update(
+                    to_update, ['high', 'low', 'close', 'tick_count'], batch_size=500
+                )
+            if to_create:
+                PriceCandle.objects.bulk_create(to_create, batch_size=500)
+
+    @staticmethod
+    def recent_candles(asset, interval='1d', limit=30):
+        """Latest ``limit`` candles for an asset, oldest first"""
+        candles = PriceCandle.objects.filter(asset=asset, interval=interval).order_by('-bucket_start')[:limit]
+        return list(reversed(candles))
@@ -0,0 +1,105 @@
+# core/services/price_stream.py
+import asyncio
+import logging
+from collections import defaultdict
+
+from core.services.quote_cache import quote_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """One open SSE connection: pending changes are coalesced until it reads"""
+
+    def __init__(self, categories=None):
+        self.categories = set(categories) if categories else None
+        self.pending = {}
+        self.event = asyncio.Event()
+
+    def wants(self, category):
+        return self.categories is None or category in self.categories
+
+    def push(self, changes):
+        self.pending.update(changes)
+        self.event.set()
+
+    async def next_changes(self):
+        await self.event.wait()
+        self.event.clear()
+        changes, self.pending = self.pending, {}
+        return changes
+
+
+class PriceBroadcaster:
+    """
+    Fans quote changes out to every SSE subscriber in this process.
+
+    A single polling task watches the shared quote snapshot's version and,
+    when the ticker publishes, diffs it once and pushes only the changed
+    quotes to each subscriber (filtered by category). A slow client just
+    receives a larger merged update next time; nothing is queued per tick.
+    """
+
+    def __init__(self, snapshot=quote_snapshot, interval=0.5):
+        self.snapshot = snapshot
+        self.interval = interval
+        self.subscribers = set()
+        self._last = {}
+        self._version = None
+        self._task = None
+
+    def current(self, subscriber):
+        """Full filtered snapshot, sent when a client connects"""
+        return {
+            asset_id: quote for asset_id, quote in self.snapshot.quotes().items()
+            if subscriber.wants(quote['category'])
+        }
+
+    def subscribe(self, categories=None):
+        subscriber = Subscriber(categories)
+        self.subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def _diff(self):
+        quotes = self.snapshot.quotes()
+        by_category = defaultdict(dict)
+        for asset_id, quote in quotes.items():
+            if self._last.get(asset_id) != quote:
+                by_category[quote['category']][asset_id] = quote
+        self._last = dict(quotes)
+        return by_category
+
+    async def _poll(self):
+        # Prime the baseline so the first diff only contains real changes
+        self._version = self.snapshot.version
+        self._last = dict(self.snapshot.quotes())
+
+        while self.subscribers:
+            await asyncio.sleep(self.interval)
+            version = self.snapshot.version
+            if version == self._version:
+                continue
+            self._version = version
+
+            by_category = self._diff()
+            if not by_category:
+                continue
+
+            for subscriber in list(self.subscribers):
+                changes = {}
+                for category, quotes in by_category.items():
+                    if subscriber.wants(category):
+                        changes.update(quotes)
+                if changes:
+                    subscriber.push(changes)
+
+        logger.debug("Price broadcaster idle, stopping poller")
+
+
+# One broadcaster per worker process
+price_broadcaster = PriceBroadcaster()
@@ -0,0 +1,129 @@
+# core/services/price_ticker.py
+import heapq
+import itertools
+import logging
+import time
+
+from django.utils import timezone
+
+from core.models import Asset
+from core.services.price_fetcher import PriceFetcher
+from core.services.quote_cache import quote_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class PriceTicker:
+    """
+    Ticks asset prices on their own schedule, outside the request cycle.
+
+    Keeps a min-heap of (due_at, generation, asset_id) entries using the
+    per-category cadence from Asset.update_interval(). Every wake-up pops all
+    due assets, prices them in one PriceFetcher.update_prices_batch() call
+    and pushes them back with their next due time. An asset gets a new
+    generation each time it is (re)scheduled by load(), so entries left in
+    the heap from before a deactivation are skipped instead of ticking it
+    twice once it is reactivated.
+    """
+
+    def __init__(self, reload_every=60, clock=time.monotonic, sleep=time.sleep):
+        self.reload_every = reload_every
+        self.clock = clock
+        self.sleep = sleep
+        self.queue = []          # heap of (due_at, generation, asset_id)
+        self.categories = {}     # asset_id -> category for every scheduled asset
+        self.generations = {}    # asset_id -> generation of its live heap entry
+        self._generation = itertools.count()
+        self.next_reload = 0
+
+    def load(self):
+        """Sync the schedule with the active asset universe"""
+        now = self.clock()
+        wall_now = timezone.now()
+        is_first_load = not self.next_reload
+        active = Asset.objects.filter(is_active=True).values_list('id', 'category', 'last_updated')
+
+        seen = set()
+        for asset_id, category, last_updated in active:
+            seen.add(asset_id)
+            is_new = asset_id not in self.categories
+            self.categories[asset_id] = category
+            if is_new:
+                # First due time follows needs_update(): last_updated + interval
+                delay = 0
+                if last_updated:
+                    due = last_updated + Asset.update_interval(category)
+                    delay = max(0, (due - wall_now).total_seconds())
+                self.generations[asset_id] = generation = next(self._generation)
+                heapq.heappush(self.queue, (now + delay, generation, asset_id))
+
+        # Deactivated/deleted assets' heap entries are dropped lazily when popped
+        removed = set(self.categories) - seen
+        for asset_id in removed:
+            del self.categories[asset_id]
+            del self.generations[asset_id]
+
+        if is_first_load or removed:
+            # Seed the shared snapshot / drop assets that are no longer active
+            quote_snapshot.rebuild()
+
+        self.next_reload = now + self.reload_every
+        return len(self.categories)
+
+    def pop_due(self, now):
+        """Pop every scheduled asset whose due time has passed"""
+        due_ids = []
+        while self.queue and self.queue[0][0] <= now:
+            _, generation, asset_id = heapq.heappop(self.queue)
+            if self.generations.get(asset_id) == generation:
+                due_ids.append(asset_id)
+        return due_ids
+
+    def tick(self):
+        """Price every due asset in one batch; returns the number updated"""
+        now = self.clock()
+        if now >= self.next_reload:
+            try:
+                self.load()
+            except Exception as e:
+                # Keep ticking the current schedule; try again next reload
+                logger.error(f"Price ticker reload failed: {str(e)}")
+                self.next_reload = now + self.reload_every
+
+        due_ids = self.pop_due(now)
+        if not due_ids:
+            return 0
+
+        assets = Asset.objects.filter(id__in=due_ids, is_active=True).only(
+            'id', 'symbol', 'category', *Asset.PRICE_FIELDS
+        )
+        try:
+            updated = PriceFetcher.update_prices_batch(assets)
+        except Exception as e:
+            logger.error(f"Price tick failed for {len(due_ids)} assets: {str(e)}")
+            updated = 0
+
+        # Reschedule from now even on failure so one bad batch can't spin the loop
+        for asset_id in due_ids:
+            interval = Asset.update_interval(self.categories[asset_id])
+            heapq.heappush(self.queue, (now + interval.total_seconds(), self.generations[asset_id], asset_id))
+
+        return updated
+
+    def seconds_until_due(self):
+        """Time to sleep before the next asset (or reload) is due"""
+        now = self.clock()
+        next_due = self.next_reload
+        if self.queue:
+            next_due = min(next_due, self.queue[0][0])
+        return max(0.0, next_due - now)
+
+    def run(self, max_ticks=None):
+        """Tick forever (or max_ticks times), sleeping until the next due time"""
+        if not self.next_reload:
+            self.load()
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            self.tick()
+            ticks += 1
+            self.sleep(self.seconds_until_due())
@@ -0,0 +1,239 @@
+# core/services/quote_cache.py
+import json
+import logging
+import mmap
+import os
+import random
+import struct
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.services.leaderboard import build_leaderboards, update_leaderboards
+
+logger = logging.getLogger(__name__)
+
+# Header: magic, reserved, sequence (version counter), payload length
+HEADER = struct.Struct('<4sIQQ')
+HEADER_SIZE = 32
+MAGIC = b'PQS1'
+MIN_CAPACITY = 64 * 1024
+
+
+class QuoteSnapshot:
+    """
+    Latest quote for every active asset, shared by all worker processes
+    through one memory-mapped file.
+
+    The price updater is the only writer. It bumps the sequence number to an
+    odd value, rewrites the JSON payload, then bumps it back to even (a
+    seqlock). Readers map the file once and compare the sequence number with
+    the version they last parsed, so a steady-state read is an 8-byte header
+    check followed by a dict lookup, and a torn read is simply retried.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or settings.QUOTE_SNAPSHOT_PATH)
+        self._map = None
+        self._version = None
+        self._data = {'quotes': {}}
+
+    # ---------------------------------------------------------------- reading
+
+    def _mapping(self):
+        if self._map is None:
+            try:
+                with open(self.path, 'rb') as fh:
+                    self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                return None  # nothing published yet (or empty file)
+        return self._map
+
+    def data(self):
+        """Full snapshot payload, re-parsed only when the version changes"""
+        mapping = self._mapping()
+        if mapping is None:
+            return self._data
+
+        for _ in range(5):
+            magic, _, seq, length = HEADER.unpack_from(mapping, 0)
+            if magic != MAGIC or seq == self._version:
+                return self._data
+            if seq % 2:
+                continue  # writer in progress
+
+            if HEADER_SIZE + length > len(mapping):
+                # File grew since it was mapped
+                self._map.close()
+                self._map = None
+                mapping = self._mapping()
+                continue
+
+            payload = mapping[HEADER_SIZE:HEADER_SIZE + length]
+            if HEADER.unpack_from(mapping, 0)[2] != seq:
+                continue  # overwritten while copying
+
+            self._data = json.loads(payload)
+            self._version = seq
+            break
+
+        return self._data
+
+    @property
+    def version(self):
+        self.data()
+        return self._version
+
+    def quotes(self):
+        """{asset_id (str): quote dict}"""
+        return self.data()['quotes']
+
+    def get(self, asset_id):
+        return self.quotes().get(str(asset_id))
+
+    def leaders(self, category='all'):
+        """Precomputed {'gainers': [ids], 'losers': [ids]} for a category"""
+        return self.data().get('leaders', {}).get(category)
+
+    def sample_ids(self, count, category=None, exclude=()):
+        """Random asset ids from the snapshot (replaces ORDER BY RANDOM())"""
+        exclude = {str(e) for e in exclude}
+        ids = [
+            asset_id for asset_id, quote in self.quotes().items()
+            if asset_id not in exclude and (category is None or quote['category'] == category)
+        ]
+        return random.sample(ids, min(count, len(ids)))
+
+    def stale_count(self):
+        """Snapshot quotes older than their category's update interval"""
+        from core.models import Asset
+
+        now = timezone.now()
+        count = 0
+        for quote in self.quotes().values():
+            updated = parse_datetime(quote['updated']) if quote['updated'] else None
+            if updated is None or updated < now - Asset.update_interval(quote['category']):
+                count += 1
+        return count
+
+    def apply(self, assets):
+        """
+        Overlay the latest published quote onto Asset instances (returns a
+        list). A quote older than the row's own last_updated is ignored, so
+        a stale snapshot never hides a fresher database price.
+        """
+        assets = list(assets)
+        quotes = self.quotes()
+        for asset in assets:
+            quote = quotes.get(str(asset.pk))
+            if not quote:
+                continue
+            updated = parse_datetime(quote['updated']) if quote['updated'] else None
+            if asset.last_updated and (updated is None or updated < asset.last_updated):
+                continue
+            asset.current_price = Decimal(quote['price'])
+            asset.previous_price = Decimal(quote['previous_price'])
+            asset.change_percentage = Decimal(quote['change'])
+            if updated:
+                asset.last_updated = updated
+        return assets
+
+    # ---------------------------------------------------------------- writing
+
+    @staticmethod
+    def quote_for(asset):
+        return {
+            'symbol': asset.symbol,
+            'category': asset.category,
+            'price': str(asset.current_price),
+            'previous_price': str(asset.previous_price),
+            'change': str(asset.change_percentage),
+            'updated': asset.last_updated.isoformat() if asset.last_updated else None,
+        }
+
+    def publish(self, assets, replace=False, remove=()):
+        """
+        Merge the given assets' prices into the snapshot (or replace it
+        entirely with replace=True), drop the ``remove`` asset ids (assets
+        deactivated or deleted) and publish a new version.
+        """
+        import fcntl  # POSIX only; readers never need it
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)  # one writer at a time
+
+            size = os.fstat(fd).st_size
+            current = {'quotes': {}}
+            seq = 0
+            if size >= HEADER_SIZE:
+                with mmap.mmap(fd, 0) as mapping:
+                    magic, _, seq, length = HEADER.unpack_from(mapping, 0)
+                    if magic == MAGIC and not replace:
+                        current = json.loads(mapping[HEADER_SIZE:HEADER_SIZE + length] or b'{"quotes": {}}')
+                    seq += seq % 2  # recover from a writer that died mid-update
+
+            quotes = {} if replace else current['quotes']
+            previous = {}  # quotes before this publish, for the leaderboard patch
+            for asset in assets:
+                asset_id = str(asset.pk)
+                previous.setdefault(asset_id, quotes.get(asset_id))
+                quotes[asset_id] = self.quote_for(asset)
+            for asset_id in remove:
+                asset_id = str(asset_id)
+                previous.setdefault(asset_id, quotes.pop(asset_id, None))
+            current['quotes'] = quotes
+            if replace or 'leaders' not in current:
+                current['leaders'] = build_leaderboards(quotes)
+            else:
+                current['leaders'] = update_leaderboards(current['leaders'], quotes, previous)
+
+            payload = json.dumps(current, separators=(',', ':')).encode()
+            needed = HEADER_SIZE + len(payload)
+            if size < needed:
+                os.ftruncate(fd, max(needed * 2, MIN_CAPACITY))
+
+            with mmap.mmap(fd, 0) as mapping:
+                HEADER.pack_into(mapping, 0, MAGIC, 0, seq + 1, 0)
+                mapping[HEADER_SIZE:needed] = payload
+                HEADER.pack_into(mapping, 0, MAGIC, 0, seq + 2, len(payload))
+                mapping.flush()
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def publish_on_commit(self, assets, remove=()):
+        """
+        Publish once the surrounding transaction commits. Used for one-off
+        writes (admin, Asset.update_price, deactivation); a snapshot that can't be
+        written is logged, not raised, since the database row is already
+        authoritative and apply() prefers it when newer.
+        """
+        assets = list(assets)
+        remove = list(remove)
+
+        def publish():
+            try:
+                self.publish(assets, remove=remove)
+            except OSError as e:
+                logger.warning(f"Could not publish quote snapshot: {str(e)}")
+
+        transaction.on_commit(publish)
+
+    def rebuild(self):
+        """Replace the snapshot with every active asset's current DB price"""
+        from core.models import Asset
+
+        assets = Asset.objects.filter(is_active=True).only(
+            'id', 'symbol', 'category', *Asset.PRICE_FIELDS
+        )
+        self.publish(assets, replace=True)
+
+
+# Shared per-process instance (keeps the mapping and parsed version)
+quote_snapshot = QuoteSnapshot()
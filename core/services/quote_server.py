@@ -0,0 +1,97 @@
+# core/services/quote_server.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from core.services.price_fetcher import PriceFetcher
+
+
+class _QuoteHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep the connection alive between batches
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/quotes':
+            self._send(404, {'error': 'not found'})
+            return
+
+        raw = parse_qs(url.query).get('symbols', [''])[0]
+        symbols = [s.strip().upper() for s in raw.split(',') if s.strip()]
+        self._send(200, {'quotes': self.server.quote(symbols)})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep test output quiet
+
+
+class StubQuoteServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the market-data API used by HTTPQuoteProvider.
+
+    Serves ``GET /quotes?symbols=A,B`` from a random walk over
+    PriceFetcher.BASE_PRICES and counts requests/connections so tests can
+    check batching and keep-alive. Use as a context manager::
+
+        with StubQuoteServer() as server:
+            provider = HTTPQuoteProvider(server.url)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, unknown_symbols=()):
+        super().__init__((host, port), _QuoteHandler)
+        self.unknown_symbols = {s.upper() for s in unknown_symbols}
+        self.prices = {}
+        self.request_count = 0
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def get_request(self):
+        conn = super().get_request()
+        with self._lock:
+            self.connection_count += 1
+        return conn
+
+    def quote(self, symbols):
+        with self._lock:
+            self.request_count += 1
+            quotes = {}
+            for symbol in symbols:
+                if symbol in self.unknown_symbols or symbol not in PriceFetcher.BASE_PRICES:
+                    continue
+                current = self.prices.get(symbol, PriceFetcher.BASE_PRICES[symbol])
+                self.prices[symbol] = float(
+                    PriceFetcher.get_realistic_price(symbol, 'stock', current)
+                )
+                quotes[symbol] = self.prices[symbol]
+            return quotes
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
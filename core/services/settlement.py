@@ -0,0 +1,278 @@
+# core/services/settlement.py
+from collections import defaultdict
+from decimal import Decimal
+import logging
+import random
+
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Count, F, Q, Value, When
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from core.models import Investment, SettlementJournal, Transaction, Wallet
+from core.money import MICROS, from_micros, mul_micros, to_micros
+from core.services.portfolio import Portfolio
+
+logger = logging.getLogger(__name__)
+
+
+class InvestmentSettlement:
+    """
+    Settle matured investments in bulk.
+
+    Due investments are taken in end_time order, a chunk at a time. Each
+    chunk is journaled (SettlementJournal) and then applied in one atomic
+    block: a bulk_update of the investments, a single UPDATE crediting
+    every affected wallet (CASE on user_id with F() arithmetic) and one
+    bulk_create of the profit transactions, so a burst of maturities costs
+    a handful of queries per chunk instead of four round trips per
+    investment. Profit and per-wallet credits are summed as integer
+    micro-units (core/money.py), not Decimals.
+    """
+
+    CHUNK_SIZE = 500
+
+    @staticmethod
+    def in_shard(queryset, shard):
+        """
+        Restrict investments to one (index, count) shard of users. Sharding by
+        user keeps every wallet row owned by exactly one settlement worker.
+        """
+        if shard is None:
+            return queryset
+        index, count = shard
+        return queryset.annotate(settlement_shard=Mod('user_id', count)).filter(settlement_shard=index)
+
+    @staticmethod
+    def simulate_profit(investment, rng=random):
+        """Expected profit with ±20% market noise (same model as complete_investment)"""
+        # invested (cents) × rate (hundredths of a percent) is exact in micros
+        expected = mul_micros(
+            to_micros(investment.invested_amount), to_micros(investment.expected_return_rate) // 100
+        )
+        factor = round(rng.uniform(0.8, 1.2) * MICROS)
+        return from_micros(mul_micros(expected, factor, places=2))
+
+    @classmethod
+    def due_ids(cls, now, limit, shard=None, after=None):
+        """
+        Up to ``limit`` due investment ids in (end_time, id) order, starting
+        after the ``after`` (end_time, id) keyset position if given.
+        Returns (ids, last position).
+        """
+        due = Investment.objects.filter(status='active', end_time__lte=now)
+        if after is not None:
+            end_time, last_id = after
+            due = due.filter(Q(end_time__gt=end_time) | Q(end_time=end_time, id__gt=last_id))
+        rows = list(
+            cls.in_shard(due, shard)
+            .order_by('end_time', 'id')
+            .values_list('end_time', 'id')[:limit]
+        )
+        return [investment_id for _, investment_id in rows], (rows[-1] if rows else after)
+
+    @classmethod
+    def settle_due(cls, now=None, chunk_size=None, limit=None, shard=None):
+        """
+        Settle every investment whose end_time has passed (optionally only
+        one (index, count) shard of users).
+        Returns {'settled': count, 'profit': total, 'chunks': count}.
+        """
+        now = now or timezone.now()
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+        stats = {'settled': 0, 'profit': Decimal('0'), 'chunks': 0}
+
+        # Walk the due set by keyset so rows that can't settle (e.g. missing
+        # wallets) are stepped over instead of being re-read every chunk
+        position = None
+        while limit is None or stats['settled'] < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - stats['settled'])
+            ids, position = cls.due_ids(now, size, shard, after=position)
+            if not ids:
+                break
+
+            settled, profit = cls.settle_chunk(ids, now)
+            stats['chunks'] += 1
+            stats['settled'] += settled
+            stats['profit'] += profit
+
+        return stats
+
+    @classmethod
+    def settle_chunk(cls, ids, now=None):
+        """
+        Settle one chunk of investment ids. Returns (count, total profit).
+
+        Two steps, each atomic: first the settlement intent (profit included)
+        is journaled, then the journal entries are applied. A crash between
+        the two leaves pending entries that replay() finishes with the same
+        recorded profit, so nothing is ever paid twice or re-rolled.
+        """
+        now = now or timezone.now()
+        cls.record_intent(ids, now)
+        return cls.apply(ids, now)
+
+    @classmethod
+    def record_intent(cls, ids, now):
+        """Journal a pending settlement for every due investment not yet journaled"""
+        with transaction.atomic():
+            due = Investment.objects.filter(id__in=ids, status='active', end_time__lte=now).only(
+                'id', 'user_id', 'invested_amount', 'expected_return_rate'
+            )
+            journaled = set(
+                SettlementJournal.objects.filter(investment_id__in=ids).values_list('investment_id', flat=True)
+            )
+            entries = [
+                SettlementJournal(
+                    investment_id=investment.id,
+                    user_id=investment.user_id,
+                    principal=investment.invested_amount,
+                    profit=cls.simulate_profit(investment),
+                )
+                for investment in due if investment.id not in journaled
+            ]
+            SettlementJournal.objects.bulk_create(entries, ignore_conflicts=True)
+        return len(entries)
+
+    @classmethod
+    def apply(cls, ids, now):
+        """
+        Apply pending journal entries for these investments in one atomic
+        block. Entries whose investment is no longer active (withdrawn or
+        settled elsewhere) are rolled back without touching the wallet;
+        entries that can't be applied (no wallet) are marked failed so
+        replay() doesn't retry them forever.
+        """
+        with transaction.atomic():
+            entries = list(
+                SettlementJournal.objects.select_for_update()
+                .filter(investment_id__in=ids, state=SettlementJournal.PENDING)
+            )
+            if not entries:
+                return 0, Decimal('0')
+
+            investments = {
+                investment.id: investment
+                for investment in Investment.objects.select_for_update()
+                .select_related('asset')
+                .filter(id__in=[entry.investment_id for entry in entries])
+            }
+            wallets = dict(
+                Wallet.objects.filter(user_id__in={entry.user_id for entry in entries})
+                .values_list('user_id', 'id')
+            )
+
+            credits = defaultdict(lambda: {'locked': 0, 'available': 0})  # micros
+            references = iter(Transaction.generate_references(len(entries)))
+            transactions = []
+            settled = []
+            resolved = []
+
+            for entry in entries:
+                investment = investments.get(entry.investment_id)
+                if investment is None or investment.status != 'active':
+                    entry.state = SettlementJournal.ROLLED_BACK
+                    entry.resolved_at = now
+                    resolved.append(entry)
+                    continue
+
+                wallet_id = wallets.get(entry.user_id)
+                if wallet_id is None:
+                    logger.error(f"Investment {investment.id} has no wallet to credit, settlement failed")
+                    entry.state = SettlementJournal.FAILED
+                    entry.resolved_at = now
+                    resolved.append(entry)
+                    continue
+
+                investment.actual_profit_loss = entry.profit
+                investment.status = 'completed'
+                investment.completed_at = now
+                investment.updated_at = now
+                settled.append(investment)
+
+                entry.state = SettlementJournal.APPLIED
+                entry.resolved_at = now
+                resolved.append(entry)
+
+                principal = to_micros(entry.principal)
+                credit = credits[entry.user_id]
+                credit['locked'] += principal
+                credit['available'] += principal + to_micros(entry.profit)
+
+                transactions.append(Transaction(
+                    user_id=entry.user_id,
+                    wallet_id=wallet_id,
+                    transaction_type=Transaction.PROFIT,
+                    payment_method='system',
+                    amount=entry.profit,
+                    status=Transaction.COMPLETED,
+                    reference=next(references),
+                    description=f"Profit from {investment.asset.name} investment",
+                ))
+
+            if settled:
+                Investment.objects.bulk_update(
+                    settled, ['actual_profit_loss', 'status', 'completed_at', 'updated_at']
+                )
+                cls.credit_wallets(credits)
+                Transaction.objects.bulk_create(transactions)
+                Portfolio.record_settlements(settled)
+            if resolved:
+                SettlementJournal.objects.bulk_update(resolved, ['state', 'resolved_at'])
+
+        total = from_micros(sum(to_micros(i.actual_profit_loss) for i in settled))
+        if settled:
+            logger.info(f"Settled {len(settled)} investments (profit {total})")
+        return len(settled), total
+
+    @classmethod
+    def replay(cls, shard=None, chunk_size=None):
+        """
+        Finish or roll back settlements left pending by a crash.
+        Returns {'applied': count, 'rolled_back': count, 'failed': count}.
+        """
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+        pending = cls.in_shard(
+            SettlementJournal.objects.filter(state=SettlementJournal.PENDING), shard
+        )
+        ids = list(pending.order_by('created_at').values_list('investment_id', flat=True))
+
+        applied = 0
+        for start in range(0, len(ids), chunk_size):
+            applied += cls.apply(ids[start:start + chunk_size], timezone.now())[0]
+
+        outcomes = dict(
+            SettlementJournal.objects.filter(investment_id__in=ids)
+            .exclude(state=SettlementJournal.APPLIED)
+            .order_by()
+            .values_list('state')
+            .annotate(count=Count('id'))
+        ) if ids else {}
+        rolled_back = outcomes.get(SettlementJournal.ROLLED_BACK, 0)
+        failed = outcomes.get(SettlementJournal.FAILED, 0)
+        if ids:
+            logger.info(
+                f"Replayed {len(ids)} pending settlements: {applied} applied, "
+                f"{rolled_back} rolled back, {failed} failed"
+            )
+        return {'applied': applied, 'rolled_back': rolled_back, 'failed': failed}
+
+    @staticmethod
+    def credit_wallets(credits):
+        """
+        Release locked funds and pay out principal + profit in one UPDATE.
+        ``credits`` is {user_id: {'locked': micros, 'available': micros}}.
+        """
+        micros = BigIntegerField()
+
+        def per_user(key):
+            return Case(
+                *[When(user_id=user_id, then=Value(c[key])) for user_id, c in credits.items()],
+                default=Value(0),
+                output_field=micros,
+            )
+
+        return Wallet.objects.filter(user_id__in=credits).update(
+            locked_balance=F('locked_balance') - per_user('locked'),
+            available_balance=F('available_balance') + per_user('available'),
+        )
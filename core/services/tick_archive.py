@@ -0,0 +1,152 @@
+# core/services/tick_archive.py
+import logging
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# One fixed-width record per tick: epoch microseconds + USD price
+TICK_DTYPE = np.dtype([('ts', '<i8'), ('price', '<f8')])
+
+EMPTY_TICKS = np.empty(0, dtype=TICK_DTYPE)
+
+
+def to_epoch_us(value):
+    """datetime -> integer epoch microseconds (the archive's timestamp unit)"""
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1_000_000)
+    return int(value)
+
+
+def from_epoch_us(value):
+    return datetime.fromtimestamp(int(value) / 1_000_000, tz=dt_timezone.utc)
+
+
+class TickArchive:
+    """
+    Columnar cold storage for price ticks, one append-only file per symbol.
+
+    Files are read through np.memmap, and range queries binary-search the
+    sorted timestamp column, so slicing months of history returns a view
+    over the mapped file with no copy and no ORM access.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.TICK_ARCHIVE_DIR)
+        self._maps = {}  # symbol -> (file size, memmap)
+
+    def path(self, symbol):
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', symbol.upper())
+        return self.root / f"{safe}.ticks"
+
+    def ticks(self, symbol):
+        """Memory-mapped structured array of every archived tick for a symbol"""
+        path = self.path(symbol)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return EMPTY_TICKS
+
+        size -= size % TICK_DTYPE.itemsize  # ignore a torn trailing record
+        if size == 0:
+            return EMPTY_TICKS
+
+        cached = self._maps.get(symbol)
+        if cached and cached[0] == size:
+            return cached[1]
+
+        ticks = np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(size // TICK_DTYPE.itemsize,))
+        self._maps[symbol] = (size, ticks)
+        return ticks
+
+    def range(self, symbol, start=None, end=None, max_points=None):
+        """
+        Ticks with start <= ts <= end (datetimes or epoch microseconds).
+        Returns a zero-copy view; max_points thins it with a strided view.
+        """
+        ticks = self.ticks(symbol)
+        if not len(ticks):
+            return ticks
+
+        timestamps = ticks['ts']
+        lo = 0 if start is None else int(np.searchsorted(timestamps, to_epoch_us(start), side='left'))
+        hi = len(ticks) if end is None else int(np.searchsorted(timestamps, to_epoch_us(end), side='right'))
+        window = ticks[lo:hi]
+
+        if max_points and len(window) > max_points:
+            step = -(-len(window) // max_points)  # ceil division
+            window = window[::step]
+        return window
+
+    def last_timestamp(self, symbol):
+        """Epoch microseconds of the newest archived tick (None if empty)"""
+        ticks = self.ticks(symbol)
+        return int(ticks['ts'][-1]) if len(ticks) else None
+
+    def append(self, symbol, timestamps, prices):
+        """
+        Append ticks (must be sorted by timestamp). Anything at or before the
+        last archived timestamp is skipped, so re-running a compaction is safe.
+        """
+        records = np.empty(len(timestamps), dtype=TICK_DTYPE)
+        records['ts'] = [to_epoch_us(ts) for ts in timestamps]
+        records['price'] = [float(p) for p in prices]
+
+        last = self.last_timestamp(symbol)
+        if last is not None:
+            records = records[records['ts'] > last]
+        if not len(records):
+            return 0
+
+        path = self.path(symbol)
+        self.root.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            # Drop a partially written record left by a crash mid-append
+            size = path.stat().st_size
+            if size % TICK_DTYPE.itemsize:
+                os.truncate(path, size - size % TICK_DTYPE.itemsize)
+        with open(path, 'ab') as fh:
+            fh.write(records.tobytes())
+            fh.flush()
+            os.fsync(fh.fileno())
+        return len(records)
+
+    def compact(self, older_than, chunk_size=5000):
+        """
+        Move PriceTick rows older than ``older_than`` into the archive.
+        Works per asset in timestamp order and deletes each chunk from the
+        database only after it has been written to disk.
+        Returns the number of rows moved out of the database.
+        """
+        from core.models import Asset, PriceTick
+
+        moved = 0
+        for asset_id, symbol in Asset.objects.values_list('id', 'symbol'):
+            asset_moved = 0
+            while True:
+                chunk = list(
+                    PriceTick.objects.filter(asset_id=asset_id, timestamp__lt=older_than)
+                    .order_by('timestamp', 'id')
+                    .values_list('id', 'timestamp', 'price')[:chunk_size]
+                )
+                if not chunk:
+                    break
+
+                ids, timestamps, prices = zip(*chunk)
+                self.append(symbol, timestamps, prices)
+                PriceTick.objects.filter(id__in=ids).delete()
+                asset_moved += len(ids)
+
+            if asset_moved:
+                logger.info(f"Archived {asset_moved} ticks for {symbol}")
+                moved += asset_moved
+        return moved
+
+
+# Shared per-process instance so memory maps are reused across requests
+tick_archive = TickArchive()
@@ -0,0 +1,76 @@
+# core/services/transaction_archive.py
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Transaction, TransactionArchive
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'wallet_id', 'transaction_type', 'payment_method', 'amount',
+    'status', 'reference', 'description', 'created_at', 'updated_at',
+)
+
+# Only final states move; pending/approved rows can still change
+ARCHIVABLE_STATUSES = (Transaction.COMPLETED, Transaction.REJECTED)
+
+
+class TransactionArchiver:
+    """
+    Moves settled transactions older than the horizon from the hot
+    Transaction table into TransactionArchive, one chunk per atomic block
+    (bulk insert into the archive, then delete from the hot table by id).
+    Ids are preserved, so (created_at, id) cursors work across both tiers.
+    """
+
+    CHUNK_SIZE = 1000
+
+    @staticmethod
+    def horizon(days=None):
+        if days is None:
+            days = settings.TRANSACTION_ARCHIVE_AFTER_DAYS
+        return timezone.now() - timedelta(days=days)
+
+    @staticmethod
+    def archivable(older_than):
+        return Transaction.objects.filter(status__in=ARCHIVABLE_STATUSES, created_at__lt=older_than)
+
+    @classmethod
+    def archive_chunk(cls, older_than, chunk_size=None):
+        """Move up to chunk_size of the oldest archivable rows; returns the number moved"""
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+        with transaction.atomic():
+            rows = list(
+                cls.archivable(older_than)
+                .order_by('created_at', 'id')
+                .values(*ARCHIVE_FIELDS)[:chunk_size]
+            )
+            if not rows:
+                return 0
+
+            # No ignore_conflicts: an id already in the archive must abort the
+            # chunk (IntegrityError rolls back) rather than drop the hot row
+            TransactionArchive.objects.bulk_create([TransactionArchive(**row) for row in rows])
+            Transaction.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        return len(rows)
+
+    @classmethod
+    def archive(cls, older_than=None, chunk_size=None, limit=None):
+        """Archive everything past the horizon (or up to limit rows); returns the total moved"""
+        older_than = older_than or cls.horizon()
+        total = 0
+        while limit is None or total < limit:
+            size = chunk_size or cls.CHUNK_SIZE
+            if limit is not None:
+                size = min(size, limit - total)
+            moved = cls.archive_chunk(older_than, size)
+            if not moved:
+                break
+            total += moved
+        if total:
+            logger.info(f"Archived {total} transactions older than {older_than.isoformat()}")
+        return total
@@ -0,0 +1,90 @@
+# core/services/transaction_history.py
+import base64
+import binascii
+import heapq
+from itertools import islice
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from core.models import Transaction, TransactionArchive
+
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(transaction):
+    """Opaque cursor pointing just after this row in (-created_at, -id) order"""
+    raw = f"{transaction.created_at.isoformat()}|{transaction.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor; raises ValueError if it was tampered with"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if created_at is None:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return created_at, pk
+
+
+class TransactionHistory:
+    """
+    Keyset pagination over a user's transactions, newest first.
+
+    Pages seek on (created_at, id) instead of using OFFSET, so with the
+    (user, [transaction_type,] -created_at, -id) indexes every page is one
+    index range scan of ``limit + 1`` rows per tier, however deep the user
+    scrolls. The hot Transaction table and TransactionArchive share ids and
+    are merged transparently.
+    """
+
+    TIERS = (Transaction, TransactionArchive)
+
+    TYPE_VALUES = {value for value, _ in Transaction.TRANSACTION_TYPE_CHOICES}
+    STATUS_VALUES = {value for value, _ in Transaction.STATUS_CHOICES}
+
+    @classmethod
+    def queryset(cls, user, transaction_type=None, status=None, model=Transaction):
+        transactions = model.objects.filter(user=user)
+        if transaction_type:
+            if transaction_type not in cls.TYPE_VALUES:
+                raise ValueError(f"Unknown transaction type: {transaction_type}")
+            transactions = transactions.filter(transaction_type=transaction_type)
+        if status:
+            if status not in cls.STATUS_VALUES:
+                raise ValueError(f"Unknown status: {status}")
+            transactions = transactions.filter(status=status)
+        return transactions
+
+    @classmethod
+    def page(cls, user, cursor=None, transaction_type=None, status=None, limit=PAGE_SIZE):
+        """Returns (transactions, next_cursor); next_cursor is None on the last page"""
+        try:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        except (TypeError, ValueError):
+            raise ValueError("limit must be a whole number") from None
+        position = decode_cursor(cursor) if cursor else None
+
+        tiers = []
+        for model in cls.TIERS:
+            transactions = cls.queryset(user, transaction_type, status, model)
+            if position:
+                created_at, pk = position
+                # The redundant created_at bound lets the index seek instead of
+                # scanning the user's whole range for the OR
+                transactions = transactions.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk),
+                    created_at__lte=created_at,
+                )
+            tiers.append(list(transactions.order_by('-created_at', '-id')[:limit + 1]))
+
+        merged = heapq.merge(*tiers, key=lambda row: (row.created_at, row.pk), reverse=True)
+        rows = list(islice(merged, limit + 1))
+        next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return rows[:limit], next_cursor
@@ -0,0 +1,133 @@
+# core/services/wallet.py
+from decimal import Decimal
+import logging
+
+from django.db import transaction
+from django.db.models import F
+
+from core.models import Bonus, Transaction, Wallet
+from core.money import to_micros
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+
+
+class InsufficientFunds(Exception):
+    """The conditional wallet UPDATE matched no row (balance too low)"""
+
+
+class WalletService:
+    """
+    Balance mutations as single conditional UPDATEs.
+
+    Every operation is ``UPDATE wallet SET x = x ± amount WHERE id = ...
+    [AND x >= amount]`` plus the matching Transaction insert, in one atomic
+    block. No SELECT, no full-row save(), and concurrent requests on the
+    same wallet can't overwrite each other or overdraw it. Balances are
+    integer micro-units in the database, so F() arithmetic takes ints from
+    to_micros(). The Wallet instance passed in is not refreshed.
+    """
+
+    @staticmethod
+    def _amount(amount):
+        amount = Decimal(amount).quantize(CENT)
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        return amount
+
+    @staticmethod
+    def _record(wallet, amount, transaction_type, payment_method, description, status):
+        return Transaction.objects.create(
+            user_id=wallet.user_id,
+            wallet=wallet,
+            transaction_type=transaction_type,
+            payment_method=payment_method,
+            amount=amount,
+            status=status,
+            description=description,
+        )
+
+    @classmethod
+    def credit(cls, wallet, amount, transaction_type=Transaction.DEPOSIT,
+               payment_method=Transaction.WALLET, description='', status=Transaction.COMPLETED):
+        """Add to the available balance"""
+        amount = cls._amount(amount)
+        with transaction.atomic():
+            Wallet.objects.filter(pk=wallet.pk).update(
+                available_balance=F('available_balance') + to_micros(amount)
+            )
+            return cls._record(wallet, amount, transaction_type, payment_method, description, status)
+
+    @classmethod
+    def debit(cls, wallet, amount, transaction_type=Transaction.WITHDRAWAL,
+              payment_method=Transaction.WALLET, description='', status=Transaction.COMPLETED):
+        """Take from the available balance; raises InsufficientFunds"""
+        amount = cls._amount(amount)
+        with transaction.atomic():
+            updated = Wallet.objects.filter(pk=wallet.pk, available_balance__gte=amount).update(
+                available_balance=F('available_balance') - to_micros(amount)
+            )
+            if not updated:
+                raise InsufficientFunds(f"Available balance is below {amount}")
+            return cls._record(wallet, -amount, transaction_type, payment_method, description, status)
+
+    @classmethod
+    def lock(cls, wallet, amount, transaction_type=Transaction.INVESTMENT,
+             payment_method=Transaction.WALLET, description='', status=Transaction.COMPLETED):
+        """Move funds from available to locked (e.g. an investment); raises InsufficientFunds"""
+        amount = cls._amount(amount)
+        with transaction.atomic():
+            updated = Wallet.objects.filter(pk=wallet.pk, available_balance__gte=amount).update(
+                available_balance=F('available_balance') - to_micros(amount),
+                locked_balance=F('locked_balance') + to_micros(amount),
+            )
+            if not updated:
+                raise InsufficientFunds(f"Available balance is below {amount}")
+            return cls._record(wallet, -amount, transaction_type, payment_method, description, status)
+
+    @classmethod
+    def unlock(cls, wallet, amount, payout=Decimal('0'), transaction_type=Transaction.PROFIT,
+               payment_method='system', description='', status=Transaction.COMPLETED):
+        """
+        Release locked funds back to available, plus an optional payout on
+        top. Records the payout (if any); raises InsufficientFunds when less
+        than ``amount`` is locked.
+        """
+        amount = cls._amount(amount)
+        payout = Decimal(payout).quantize(CENT)
+        with transaction.atomic():
+            updated = Wallet.objects.filter(pk=wallet.pk, locked_balance__gte=amount).update(
+                locked_balance=F('locked_balance') - to_micros(amount),
+                available_balance=F('available_balance') + to_micros(amount + payout),
+            )
+            if not updated:
+                raise InsufficientFunds(f"Locked balance is below {amount}")
+            if payout:
+                return cls._record(wallet, payout, transaction_type, payment_method, description, status)
+
+    @classmethod
+    def claim_welcome_bonus(cls, wallet, amount):
+        """Credit the one-off welcome bonus; returns None if it was already claimed"""
+        amount = cls._amount(amount)
+        with transaction.atomic():
+            updated = Wallet.objects.filter(pk=wallet.pk, bonus_claimed=0).update(
+                bonus_balance=F('bonus_balance') + to_micros(amount),
+                bonus_claimed=True,
+            )
+            if not updated:
+                return None
+            return cls._record(
+                wallet, amount, Transaction.BONUS, 'system', "Welcome bonus claimed", Transaction.COMPLETED
+            )
+
+    @classmethod
+    def claim_bonus(cls, wallet, bonus):
+        """Mark an unclaimed Bonus claimed and credit it; returns None if already claimed"""
+        with transaction.atomic():
+            if not Bonus.objects.filter(pk=bonus.pk, user_id=wallet.user_id, is_claimed=False).update(is_claimed=True):
+                return None
+            bonus.is_claimed = True
+            return cls.credit(
+                wallet, bonus.amount, Transaction.BONUS, 'system', f"Claimed bonus: {bonus.title}"
+            )
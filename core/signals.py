@@ -0,0 +1,52 @@
+# core/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.models import Asset, Currency
+from core.services.asset_facets import invalidate_category_facets
+from core.services.currency_registry import CurrencyRegistry
+from core.services.quote_cache import quote_snapshot
+
+
+def _facet_state(asset):
+    # Read from __dict__ so deferred fields never trigger a query
+    return asset.__dict__.get('category'), asset.__dict__.get('is_active')
+
+
+@receiver(post_init, sender=Asset)
+def remember_asset_facet_state(sender, instance, **kwargs):
+    instance._facet_state = _facet_state(instance)
+
+
+@receiver(post_save, sender=Asset)
+def asset_saved(sender, instance, created, **kwargs):
+    """Only category/active changes affect the facet counts (not price ticks)"""
+    previous = instance._facet_state
+    state = _facet_state(instance)
+    if created or state != previous:
+        invalidate_category_facets()
+    instance._facet_state = state
+
+    # Per-row writes (admin, update_price) reach the snapshot too; the
+    # batch ticker uses bulk_update and publishes on its own
+    update_fields = kwargs.get('update_fields')
+    if instance.is_active:
+        if update_fields is None or set(update_fields) & set(Asset.PRICE_FIELDS):
+            quote_snapshot.publish_on_commit([instance])
+    elif previous[1] is not False:
+        # Just deactivated: stop serving it from the snapshot
+        quote_snapshot.publish_on_commit([], remove=[instance.pk])
+
+
+@receiver(post_delete, sender=Asset)
+def asset_deleted(sender, instance, **kwargs):
+    invalidate_category_facets()
+    quote_snapshot.publish_on_commit([], remove=[instance.pk])
+
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+def currency_changed(sender, **kwargs):
+    """Rates/active flags changed: make every process reload its registry"""
+    transaction.on_commit(CurrencyRegistry.bump)
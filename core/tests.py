@@ -1,3 +1,732 @@
-from django.test import TestCase
+import copy
+import random
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Avg, Sum
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from core.middleware import AccountMiddleware
+from core.models import Asset, Currency, FxRate, Investment, ReferenceWorkerLease, SettlementJournal, Transaction, User, Wallet
+from core.money import MicroMoneyField, from_micros, mul_micros, round_micros, to_micros
+from core.services.fx_rates import FxRateProvider, FxRates, HTTPFxRateProvider
+from core.services.leaderboard import build_leaderboards, update_leaderboards
+from core.services.maturity_scheduler import MaturityScheduler
+from core.services.market_data import CircuitBreaker, HTTPQuoteProvider, QuoteProvider
+from core.services.price_ticker import PriceTicker
+from core.services.quote_cache import QuoteSnapshot, quote_snapshot
+from core.services.quote_server import StubQuoteServer
+from core.services.settlement import InvestmentSettlement
+from core.services.wallet import InsufficientFunds, WalletService
+from core.utils.references import ReferenceAllocator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_assets(*symbols):
+    return [Asset(symbol=symbol, category='stock', current_price=Decimal('100')) for symbol in symbols]
+
+
+def use_scratch_snapshot(test):
+    """Point the shared quote snapshot (signals, ticker) at a temporary file for one test"""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    original = quote_snapshot.__dict__.copy()
+    test.addCleanup(quote_snapshot.__dict__.update, original)
+    quote_snapshot.__dict__.update(QuoteSnapshot(f"{directory.name}/quotes.snapshot").__dict__)
+
+
+def make_user(name, wallet=True, **balances):
+    user = User.objects.create(username=name, phone=f'+000{name}', email=f'{name}@example.com')
+    if wallet:
+        Wallet.objects.create(user=user, **balances)
+    return user
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=self.clock)
+
+    def test_trips_after_threshold(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_lets_one_trial_through(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now += 30
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())  # concurrent caller while the trial runs
+
+    def test_failed_trial_reopens(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow())
+
+    def test_successful_trial_closes(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.allow())
+
+
+class CannedQuoteServer(StubQuoteServer):
+    """Answers every request with the same ``quotes`` payload"""
+
+    def __init__(self, payload):
+        super().__init__()
+        self.payload = payload
+
+    def quote(self, symbols):
+        with self._lock:
+            self.request_count += 1
+        return self.payload
+
+
+class HTTPQuoteProviderTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=self.clock)
+
+    def test_quote_provider_is_abstract(self):
+        with self.assertRaises(TypeError):
+            QuoteProvider()
+
+    def test_batches_over_one_keep_alive_connection(self):
+        with StubQuoteServer() as server:
+            provider = HTTPQuoteProvider(server.url, batch_size=2, breaker=self.breaker)
+            quotes = provider.get_quotes(make_assets('AAPL', 'MSFT', 'TSLA', 'AMZN', 'GOOGL'))
+
+        self.assertEqual(set(quotes), {'AAPL', 'MSFT', 'TSLA', 'AMZN', 'GOOGL'})
+        self.assertTrue(all(price > 0 for price in quotes.values()))
+        self.assertEqual(server.request_count, 3)
+        self.assertEqual(server.connection_count, 1)
+
+    def test_unknown_symbols_use_fallback(self):
+        with StubQuoteServer(unknown_symbols=['MSFT']) as server:
+            provider = HTTPQuoteProvider(server.url, breaker=self.breaker)
+            quotes = provider.get_quotes(make_assets('AAPL', 'MSFT'))
+
+        self.assertIsNotNone(quotes['MSFT'])
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_invalid_prices_are_dropped(self):
+        payload = {'AAPL': 'NaN', 'MSFT': 'Infinity', 'TSLA': -5, 'AMZN': 0, 'GOOGL': 'n/a', 'NVDA': 123.5}
+        with CannedQuoteServer(payload) as server:
+            provider = HTTPQuoteProvider(server.url, breaker=self.breaker)
+            with self.assertLogs('core.services.market_data', 'WARNING'):
+                quotes = provider.fetch(list(payload))
+
+        self.assertEqual(quotes, {'NVDA': 123.5})
+
+    def test_malformed_payload_counts_as_failure_and_frees_the_trial(self):
+        self.breaker.record_failure()
+        self.clock.now += 30
+        with CannedQuoteServer(['not', 'a', 'dict']) as server:
+            provider = HTTPQuoteProvider(server.url, breaker=self.breaker)
+            quotes = provider.get_quotes(make_assets('AAPL'))
+
+        self.assertIsNotNone(quotes['AAPL'])  # served by the fallback
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow())  # the next trial isn't blocked
+
+    def test_unexpected_error_releases_the_trial(self):
+        def broken(symbols):
+            raise RuntimeError("bug")
+
+        self.breaker.record_failure()
+        self.clock.now += 30
+        provider = HTTPQuoteProvider('http://127.0.0.1:9', breaker=self.breaker)
+        provider.fetch = broken
+        with self.assertRaises(RuntimeError):
+            provider.get_quotes(make_assets('AAPL'))
+
+        self.assertTrue(self.breaker.allow())
+
+    def test_trip_fallback_and_reset(self):
+        server = StubQuoteServer()
+        url = server.url
+        server.server_close()  # nothing listening: every call fails
+
+        provider = HTTPQuoteProvider(url, timeout=1, breaker=self.breaker)
+        quotes = provider.get_quotes(make_assets('AAPL'))
+        self.assertIsNotNone(quotes['AAPL'])  # served by the fallback
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        with StubQuoteServer() as server:
+            provider = HTTPQuoteProvider(server.url, breaker=self.breaker)
+
+            # Open: upstream isn't called at all
+            provider.get_quotes(make_assets('AAPL'))
+            self.assertEqual(server.request_count, 0)
+
+            # Half-open after the timeout: one trial succeeds and closes it
+            self.clock.now += 30
+            provider.get_quotes(make_assets('AAPL'))
+            self.assertEqual(server.request_count, 1)
+            self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+
+class FxRateProviderTests(SimpleTestCase):
+
+    def test_fx_rate_provider_is_abstract(self):
+        with self.assertRaises(TypeError):
+            FxRateProvider()
+
+    def test_http_provider_drops_unusable_rates(self):
+        items = [('KES', 129.5), ('EUR', 0), ('GBP', -1), ('JPY', 'NaN'), ('CHF', 'Infinity'), ('ZAR', 'n/a')]
+        with self.assertLogs('core.services.fx_rates', 'WARNING'):
+            rates = dict(HTTPFxRateProvider._valid(items))
+        self.assertEqual(rates, {'KES': Decimal('129.50000000')})
+
+
+class CannedFxRateProvider(FxRateProvider):
+    name = 'canned'
+
+    def __init__(self, rates):
+        self.rates = rates
+
+    def get_rates(self, codes):
+        return dict(self.rates)
+
+
+class FxRefreshTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Currency.objects.create(code='USD', name='US Dollar', symbol='$', exchange_rate=Decimal('1'))
+        Currency.objects.create(code='KES', name='Kenyan Shilling', symbol='KSh', exchange_rate=Decimal('129.0000'))
+        Currency.objects.create(code='BTC', name='Bitcoin', symbol='B', exchange_rate=Decimal('0.0001'))
+
+    def test_only_requested_positive_rates_are_stored(self):
+        provider = CannedFxRateProvider({
+            'KES': Decimal('130.25'),
+            'BTC': Decimal('0.00001'),  # rounds to 0.0000 as a live rate
+            'XAU': Decimal('0.0005'),  # never requested
+        })
+        with self.assertLogs('core.services.fx_rates', 'WARNING'):
+            rows = FxRates.refresh(provider)
+
+        self.assertEqual(sorted(row.currency_code for row in rows), ['KES', 'USD'])
+        self.assertFalse(FxRate.objects.filter(currency_code__in=['BTC', 'XAU']).exists())
+        self.assertEqual(Currency.objects.get(code='KES').exchange_rate, Decimal('130.2500'))
+        self.assertEqual(Currency.objects.get(code='BTC').exchange_rate, Decimal('0.0001'))
+
+
+class MoneyTests(SimpleTestCase):
+
+    def test_to_micros_rounds_half_even(self):
+        cases = [
+            (Decimal('0.0000005'), 0),
+            (Decimal('0.0000015'), 2),
+            (Decimal('0.0000025'), 2),
+            (Decimal('-0.0000015'), -2),
+            (Decimal('-0.0000025'), -2),
+            (Decimal('1.2345665'), 1234566),
+            (Decimal('1.2345675'), 1234568),
+            ('0.1', 100000),
+            (0.1, 100000),  # via str(), not the binary float
+            (3, 3000000),
+            (True, 1000000),
+            (None, None),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(to_micros(value), expected)
+
+    def test_round_micros_half_even(self):
+        cases = [
+            (5000, 2, 0),
+            (15000, 2, 20000),
+            (25000, 2, 20000),
+            (14999, 2, 10000),
+            (-15000, 2, -20000),
+            (-25000, 2, -20000),
+            (1005000, 2, 1000000),
+            (1015000, 2, 1020000),
+            (2500000, 0, 2000000),
+            (3500000, 0, 4000000),
+            (1234567, 6, 1234567),
+        ]
+        for micros, places, expected in cases:
+            with self.subTest(micros=micros, places=places):
+                self.assertEqual(round_micros(micros, places), expected)
+
+    def test_mul_micros_rounds_once_half_even(self):
+        cases = [
+            (1, 500000, 6, 0),  # 0.5 micro
+            (3, 500000, 6, 2),
+            (5, 500000, 6, 2),
+            (1000000, 125000, 2, 120000),  # 1.00 × 0.125 = 0.125
+            (1000000, 135000, 2, 140000),
+            (-1000000, 125000, 2, -120000),
+            # 0.005000005 rounds up to 0.01; rounding to micros first would give 0.00
+            (1000001, 5000, 2, 10000),
+        ]
+        for micros, factor, places, expected in cases:
+            with self.subTest(micros=micros, factor=factor, places=places):
+                self.assertEqual(mul_micros(micros, factor, places), expected)
+
+    def test_from_micros(self):
+        self.assertEqual(str(from_micros(1230000)), '1.23')
+        self.assertEqual(str(from_micros(1234500)), '1.234500')
+        self.assertEqual(str(from_micros(2500000.5)), '2.50')  # half-even on aggregate floats
+        self.assertEqual(str(from_micros(2500001.5)), '2.500002')
+        self.assertIsNone(from_micros(None))
+
+
+class MicroMoneyFieldTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for number, balance in enumerate(('10.00', '15.01')):
+            make_user(f'money{number}', available_balance=Decimal(balance))
+
+    def test_round_trip(self):
+        wallet = Wallet.objects.get(user__username='money1')
+        self.assertEqual(wallet.available_balance, Decimal('15.01'))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT available_balance FROM core_wallet WHERE id = %s', [wallet.pk])
+            self.assertEqual(cursor.fetchone()[0], 15010000)
+
+    def test_sum_returns_decimal(self):
+        total = Wallet.objects.aggregate(total=Sum('available_balance'))['total']
+        self.assertEqual(total, Decimal('25.01'))
+
+    def test_avg_needs_output_field(self):
+        # Avg over an integer column resolves to FloatField: raw micros
+        raw = Wallet.objects.aggregate(average=Avg('available_balance'))['average']
+        self.assertIsInstance(raw, float)
+        self.assertEqual(raw, 12505000.0)
+
+        average = Wallet.objects.aggregate(
+            average=Avg('available_balance', output_field=MicroMoneyField())
+        )['average']
+        self.assertEqual(average, Decimal('12.505000'))
+
+
+class WalletMicroMoneyMigrationTests(TransactionTestCase):
+    """0009 copies DECIMAL balances into BIGINT micros and back"""
+
+    before = [('core', '0008_fxrate')]
+    after = [('core', '0009_wallet_micro_money')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def raw_balances(self, wallet_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT available_balance, locked_balance, bonus_balance, bonus_claimed '
+                'FROM core_wallet WHERE id = %s',
+                [wallet_id],
+            )
+            return cursor.fetchone()
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_forward_and_reverse_copy(self):
+        apps = self.migrate(self.before)
+        OldUser = apps.get_model('core', 'User')
+        OldWallet = apps.get_model('core', 'Wallet')
+        user = OldUser.objects.create(username='migrated', phone='+000migrated', email='migrated@example.com')
+        wallet = OldWallet.objects.create(
+            user=user,
+            available_balance=Decimal('1234.56'),
+            locked_balance=Decimal('0.01'),
+            bonus_balance=Decimal('99999999.99'),
+            bonus_claimed=Decimal('0'),
+        )
+
+        apps = self.migrate(self.after)
+        self.assertEqual(self.raw_balances(wallet.pk), (1234560000, 10000, 99999999990000, 0))
+        migrated = apps.get_model('core', 'Wallet').objects.get(pk=wallet.pk)
+        self.assertEqual(migrated.available_balance, Decimal('1234.56'))
+        self.assertEqual(migrated.bonus_balance, Decimal('99999999.99'))
+
+        apps = self.migrate(self.before)
+        restored = apps.get_model('core', 'Wallet').objects.get(pk=wallet.pk)
+        self.assertEqual(
+            (restored.available_balance, restored.locked_balance, restored.bonus_balance, restored.bonus_claimed),
+            (Decimal('1234.56'), Decimal('0.01'), Decimal('99999999.99'), Decimal('0')),
+        )
+
+
+class ReferenceAllocatorTests(TestCase):
+
+    def frozen(self):
+        return 1_800_000_000.0
+
+    def test_allocators_never_collide_under_a_frozen_clock(self):
+        first = ReferenceAllocator(clock=self.frozen)
+        second = ReferenceAllocator(clock=self.frozen)
+
+        # More than one millisecond's worth of sequence numbers each
+        references = first.allocate(5000) + second.allocate(5000)
+
+        self.assertNotEqual(first.worker_id, second.worker_id)
+        self.assertEqual(len(set(references)), 10000)
+
+    def test_forked_child_leases_its_own_worker_id(self):
+        parent = ReferenceAllocator(clock=self.frozen)
+        parent.next()
+
+        child = copy.copy(parent)
+        child._reset()  # what os.register_at_fork runs in the child
+        child.next()
+
+        self.assertNotEqual(child.worker_id, parent.worker_id)
+
+    def test_expired_lease_is_reused(self):
+        ReferenceWorkerLease.objects.create(
+            worker_id=0, owner='gone', expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        allocator = ReferenceAllocator(clock=self.frozen)
+        allocator.next()
+
+        self.assertEqual(allocator.worker_id, 0)
+        self.assertEqual(ReferenceWorkerLease.objects.get(worker_id=0).owner, allocator._owner)
+
+
+class SettlementTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.asset = Asset.objects.create(name='Apple', symbol='AAPL', category='stock', current_price=Decimal('100'))
+        cls.user = make_user('investor', locked_balance=Decimal('100.00'))
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def invest(self, user=None, amount='100.00', ended=timedelta(minutes=1)):
+        return Investment.objects.create(
+            user=user or self.user,
+            asset=self.asset,
+            invested_amount=Decimal(amount),
+            expected_return_rate=Decimal('5.00'),
+            end_time=self.now - ended,
+        )
+
+    def balances(self, user=None):
+        wallet = Wallet.objects.get(user=user or self.user)
+        return wallet.available_balance, wallet.locked_balance
+
+    def test_replay_applies_intent_left_by_a_crash(self):
+        investment = self.invest()
+        InvestmentSettlement.record_intent([investment.id], self.now)  # ...and the worker dies here
+
+        entry = SettlementJournal.objects.get(investment=investment)
+        self.assertEqual(entry.state, SettlementJournal.PENDING)
+        self.assertEqual(self.balances(), (Decimal('0'), Decimal('100.00')))
+
+        replayed = InvestmentSettlement.replay()
+
+        self.assertEqual(replayed, {'applied': 1, 'rolled_back': 0, 'failed': 0})
+        investment.refresh_from_db()
+        self.assertEqual(investment.status, 'completed')
+        self.assertEqual(investment.actual_profit_loss, entry.profit)  # the recorded profit, not a re-roll
+        self.assertEqual(self.balances(), (Decimal('100.00') + entry.profit, Decimal('0')))
+        self.assertEqual(Transaction.objects.filter(user=self.user, transaction_type=Transaction.PROFIT).count(), 1)
+
+    def test_second_replay_is_a_no_op(self):
+        investment = self.invest()
+        InvestmentSettlement.record_intent([investment.id], self.now)
+        InvestmentSettlement.replay()
+        after_first = self.balances()
+
+        replayed = InvestmentSettlement.replay()
+
+        self.assertEqual(replayed, {'applied': 0, 'rolled_back': 0, 'failed': 0})
+        self.assertEqual(self.balances(), after_first)
+        self.assertEqual(Transaction.objects.filter(user=self.user, transaction_type=Transaction.PROFIT).count(), 1)
+
+    def test_cancelled_investment_rolls_back(self):
+        investment = self.invest()
+        InvestmentSettlement.record_intent([investment.id], self.now)
+        Investment.objects.filter(pk=investment.pk).update(status='cancelled')
+
+        replayed = InvestmentSettlement.replay()
+
+        self.assertEqual(replayed, {'applied': 0, 'rolled_back': 1, 'failed': 0})
+        self.assertEqual(SettlementJournal.objects.get(investment=investment).state, SettlementJournal.ROLLED_BACK)
+        self.assertEqual(self.balances(), (Decimal('0'), Decimal('100.00')))
+
+    def test_missing_wallet_is_dead_lettered(self):
+        orphan = make_user('orphan', wallet=False)
+        investment = self.invest(user=orphan)
+        InvestmentSettlement.record_intent([investment.id], self.now)
+
+        with self.assertLogs('core.services.settlement', 'ERROR'):
+            replayed = InvestmentSettlement.replay()
+
+        self.assertEqual(replayed, {'applied': 0, 'rolled_back': 0, 'failed': 1})
+        self.assertEqual(SettlementJournal.objects.get(investment=investment).state, SettlementJournal.FAILED)
+        self.assertEqual(InvestmentSettlement.replay(), {'applied': 0, 'rolled_back': 0, 'failed': 0})
+        investment.refresh_from_db()
+        self.assertEqual(investment.status, 'active')
+
+    def test_shards_partition_the_due_set(self):
+        users = [make_user(f'sharded{number}') for number in range(7)]
+        for number, user in enumerate(users):
+            self.invest(user=user, ended=timedelta(minutes=number + 1))
+            self.invest(user=user, ended=timedelta(minutes=number + 1))
+        self.invest(ended=-timedelta(hours=1))  # not due yet
+
+        due, _ = InvestmentSettlement.due_ids(self.now, 100)
+        shards = [set(InvestmentSettlement.due_ids(self.now, 100, shard=(index, 3))[0]) for index in range(3)]
+
+        self.assertEqual(len(due), 14)
+        self.assertEqual(sum(len(shard) for shard in shards), len(due))  # disjoint
+        self.assertEqual(set().union(*shards), set(due))
+
+        settled = sum(
+            InvestmentSettlement.settle_due(self.now, chunk_size=4, shard=(index, 3))['settled']
+            for index in range(3)
+        )
+        self.assertEqual(settled, 14)
+        self.assertFalse(Investment.objects.filter(status='active', end_time__lte=self.now).exists())
+
+
+class WalletServiceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('saver', available_balance=Decimal('50.00'))
+
+    def setUp(self):
+        self.wallet = Wallet.objects.get(user=self.user)
+
+    def balances(self):
+        self.wallet.refresh_from_db()
+        return self.wallet.available_balance, self.wallet.locked_balance, self.wallet.bonus_balance
+
+    def test_debit_with_insufficient_funds_changes_nothing(self):
+        with self.assertRaises(InsufficientFunds):
+            WalletService.debit(self.wallet, Decimal('50.01'))
+
+        self.assertEqual(self.balances(), (Decimal('50.00'), Decimal('0'), Decimal('0')))
+        self.assertFalse(Transaction.objects.filter(wallet=self.wallet).exists())
+
+    def test_debit(self):
+        transaction = WalletService.debit(self.wallet, Decimal('20.00'))
+
+        self.assertEqual(transaction.amount, Decimal('-20.00'))
+        self.assertEqual(self.balances()[0], Decimal('30.00'))
+
+    def test_lock_and_unlock_move_funds(self):
+        WalletService.lock(self.wallet, Decimal('30.00'))
+        self.assertEqual(self.balances(), (Decimal('20.00'), Decimal('30.00'), Decimal('0')))
+
+        payout = WalletService.unlock(self.wallet, Decimal('30.00'), payout=Decimal('1.50'))
+        self.assertEqual(self.balances(), (Decimal('51.50'), Decimal('0'), Decimal('0')))
+        self.assertEqual(payout.amount, Decimal('1.50'))
+
+        with self.assertRaises(InsufficientFunds):
+            WalletService.unlock(self.wallet, Decimal('0.01'))
+        with self.assertRaises(InsufficientFunds):
+            WalletService.lock(self.wallet, Decimal('51.51'))
+        self.assertEqual(self.balances(), (Decimal('51.50'), Decimal('0'), Decimal('0')))
+
+    def test_welcome_bonus_only_once(self):
+        self.assertIsNotNone(WalletService.claim_welcome_bonus(self.wallet, Decimal('10.00')))
+        self.assertIsNone(WalletService.claim_welcome_bonus(self.wallet, Decimal('10.00')))
+
+        self.assertEqual(self.balances()[2], Decimal('10.00'))
+        self.assertEqual(Transaction.objects.filter(wallet=self.wallet, transaction_type=Transaction.BONUS).count(), 1)
+
+    def test_sub_cent_amounts_are_rejected(self):
+        for operation in (WalletService.credit, WalletService.debit, WalletService.lock, WalletService.unlock):
+            with self.subTest(operation=operation.__name__), self.assertRaises(ValueError):
+                operation(self.wallet, Decimal('0.004'))
+        self.assertEqual(self.balances(), (Decimal('50.00'), Decimal('0'), Decimal('0')))
+
+
+class AccountMiddlewareTests(SimpleTestCase):
+
+    def test_sync_chain(self):
+        middleware = AccountMiddleware(lambda request: HttpResponse(type(request.account).__name__))
+
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertEqual(middleware(RequestFactory().get('/')).content, b'RequestAccount')
+
+    async def test_async_chain_stays_async(self):
+        async def view(request):
+            return HttpResponse(type(request.account).__name__)
+
+        middleware = AccountMiddleware(view)
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(RequestFactory().get('/'))
+        self.assertEqual(response.content, b'RequestAccount')
+
+
+class QuoteSnapshotSignalTests(TestCase):
+
+    def setUp(self):
+        use_scratch_snapshot(self)
+
+    def save(self, asset):
+        with self.captureOnCommitCallbacks(execute=True):
+            asset.save()
+
+    def test_deactivated_asset_leaves_the_snapshot(self):
+        asset = Asset(name='Apple', symbol='AAPL', category='stock', current_price=Decimal('100'))
+        self.save(asset)
+        self.assertIsNotNone(quote_snapshot.get(asset.pk))
+
+        asset.is_active = False
+        self.save(asset)
+        self.assertIsNone(quote_snapshot.get(asset.pk))
+        self.assertEqual(quote_snapshot.sample_ids(5), [])
+
+    def test_deleted_asset_leaves_the_snapshot(self):
+        asset = Asset(name='Apple', symbol='AAPL', category='stock', current_price=Decimal('100'))
+        self.save(asset)
+        asset_id = asset.pk
+
+        with self.captureOnCommitCallbacks(execute=True):
+            asset.delete()
+        self.assertIsNone(quote_snapshot.get(asset_id))
+
+
+class MaturitySchedulerRetryTests(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.clock.now = 1_800_000_000.0
+        self.scheduler = MaturityScheduler(clock=self.clock)
+
+    def test_failed_chunk_backs_off_exponentially_then_gives_up(self):
+        failing = mock.patch.object(InvestmentSettlement, 'settle_chunk', side_effect=RuntimeError("constraint"))
+        self.scheduler.next_resync = float('inf')
+        self.scheduler.schedule('stuck', self.clock.now)
+
+        delays = []
+        with failing, self.assertLogs('core.services.maturity_scheduler', 'ERROR'):
+            while self.scheduler.queue:
+                due_at = self.scheduler.queue[0][0]
+                delays.append(due_at - self.clock.now)
+                self.clock.now = due_at
+                self.scheduler.settle()
+
+        self.assertEqual(delays, [0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 300, 300])
+        self.assertIn('stuck', self.scheduler.abandoned)
+        self.scheduler.schedule('stuck', self.clock.now)
+        self.assertEqual(self.scheduler.queue, [])
+
+    def test_backoff_is_capped(self):
+        self.scheduler.attempts['slow'] = 9
+        self.scheduler.retry(['slow'], 0)
+        self.assertEqual(self.scheduler.queue, [(MaturityScheduler.MAX_RETRY_DELAY, 'slow')])
+
+
+class LeaderboardTests(SimpleTestCase):
+
+    def quote(self, rng):
+        return {'category': rng.choice(['stock', 'crypto', 'forex']), 'change': str(round(rng.uniform(-9, 9), 1))}
+
+    def test_incremental_updates_match_a_full_rebuild(self):
+        rng = random.Random(8)
+        quotes = {str(number): self.quote(rng) for number in range(40)}
+        leaders = build_leaderboards(quotes)
+
+        for _ in range(300):
+            previous = {}
+            for asset_id in rng.sample(range(45), rng.randint(1, 4)):
+                asset_id = str(asset_id)
+                previous.setdefault(asset_id, quotes.get(asset_id))
+                if rng.random() < 0.1:
+                    quotes.pop(asset_id, None)  # deactivated
+                else:
+                    quotes[asset_id] = self.quote(rng)  # ticked, recategorised or new
+
+            leaders = update_leaderboards(leaders, quotes, previous)
+            self.assertEqual(leaders, build_leaderboards(quotes))
+
+    def test_tick_below_the_leaders_does_not_rescan(self):
+        class Quotes(dict):
+            scans = 0
+
+            def items(self):
+                Quotes.scans += 1
+                return super().items()
+
+        quotes = Quotes({str(number): {'category': 'stock', 'change': str(number)} for number in range(20)})
+        leaders = build_leaderboards(quotes)
+        Quotes.scans = 0
+
+        previous = {'10': quotes['10']}
+        quotes['10'] = {'category': 'stock', 'change': '10.5'}
+        leaders = update_leaderboards(leaders, quotes, previous)
+        self.assertEqual(Quotes.scans, 0)
+
+        previous = {'19': quotes['19']}  # the top gainer falls out
+        quotes['19'] = {'category': 'stock', 'change': '0.5'}
+        leaders = update_leaderboards(leaders, quotes, previous)
+        self.assertGreater(Quotes.scans, 0)
+        self.assertEqual(leaders, build_leaderboards(quotes))
+
+
+class PriceTickerTests(TestCase):
+
+    def setUp(self):
+        use_scratch_snapshot(self)
+        self.clock = FakeClock()
+        self.ticker = PriceTicker(clock=self.clock, sleep=lambda seconds: None)
+        self.asset = Asset.objects.create(name='Apple', symbol='AAPL', category='stock', current_price=Decimal('100'))
+
+    def set_active(self, is_active):
+        Asset.objects.filter(pk=self.asset.pk).update(is_active=is_active)
+        self.ticker.load()
+
+    def test_reactivated_asset_is_scheduled_once(self):
+        self.ticker.load()
+        self.set_active(False)
+        self.set_active(True)  # before the old heap entry was popped
+
+        self.assertEqual(len(self.ticker.queue), 2)
+        self.assertEqual(self.ticker.pop_due(float('inf')), [self.asset.pk])
+
+    def test_failed_reload_does_not_stop_the_ticker(self):
+        self.ticker.load()
+        self.clock.now += self.ticker.reload_every
+
+        with mock.patch.object(PriceTicker, 'load', side_effect=OSError("disk full")), \
+                self.assertLogs('core.services.price_ticker', 'ERROR'):
+            self.ticker.tick()
+
+        self.assertEqual(self.ticker.next_reload, self.clock.now + self.ticker.reload_every)
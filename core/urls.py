@@ -31,10 +31,17 @@ urlpatterns = [
     path('deposit/', views.deposit, name='deposit'),
     path('withdraw/', views.withdraw, name='withdraw'),
     path('claim-bonus/', views.claim_bonus, name='claim_bonus'),
+    path('transactions/', views.transaction_history, name='transaction_history'),
+    path('transactions/api/', views.transaction_history_api, name='transaction_history_api'),
+    path('export/<str:kind>.<str:fmt>', views.export_data, name='export_data'),
+    path('staff/export/<str:kind>.<str:fmt>', views.staff_export_data, name='staff_export_data'),
     
     path('assets/', views.assets_view, name='assets'),
     path('assets/<uuid:asset_id>/', views.asset_detail, name='asset_detail'),
     path('asset/<uuid:asset_id>/invest/', views.invest_asset, name='invest_asset'),  # UUID
+    path('assets/<str:symbol>/ticks/', views.asset_ticks, name='asset_ticks'),
+    path('prices/stream/', views.price_stream, name='price_stream'),
+    path('prices/quotes/', views.price_quotes, name='price_quotes'),
     path('active/', views.active_investments, name='active_investments'),
     path('history/', views.investment_history, name='history'),
     path('withdraw/<uuid:investment_id>/', views.withdraw_investment, name='withdraw'),
@@ -1,6 +1,9 @@
 # core/utils/currency.py
 from decimal import Decimal
+from functools import lru_cache
+
 from core.models import Currency, Wallet
+from core.services.currency_registry import currency_registry
 
 BASE_CURRENCY = "USD"
 
@@ -9,6 +12,11 @@ def get_user_currency(request):
     Get user's preferred currency.
     Priority: Wallet → Cookie → USD
     """
+    # Resolved once per request by core.middleware.AccountMiddleware
+    account = getattr(request, 'account', None)
+    if account is not None:
+        return account.currency
+
     code = BASE_CURRENCY  # Default fallback
     
     # For authenticated users
@@ -27,29 +35,71 @@ def get_user_currency(request):
         # For non-authenticated users, use cookie
         code = request.COOKIES.get('currency', BASE_CURRENCY)
     
-    # Get currency object
-    try:
-        currency = Currency.objects.get(code=code, is_active=True)
-    except Currency.DoesNotExist:
-        # Fallback to USD
-        currency = Currency.objects.get(code=BASE_CURRENCY)
-    
+    return resolve_currency(code)
+
+def resolve_currency(code):
+    """Active currency for a code, falling back to USD (served from the in-process registry)"""
+    currency = currency_registry.get(code) or currency_registry.get(BASE_CURRENCY, active_only=False)
+    if currency is None:
+        raise Currency.DoesNotExist(f"Currency {BASE_CURRENCY} is not configured")
     return currency
 
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+class CurrencyConverter:
+    """
+    USD → display-currency conversion bound to one currency.
+
+    The rate is parsed and the cent quantizer built once, so converting is a
+    multiply and a quantize per amount. Use ``convert_many`` for lists,
+    querysets (optionally reading one attribute) or ``values_list`` rows.
+    """
+
+    def __init__(self, currency):
+        self.currency = currency
+        self.code = currency.code
+        self.symbol = currency.symbol
+        # USD amounts are only rounded, never multiplied
+        self.rate = None if currency.code == BASE_CURRENCY else Decimal(str(currency.exchange_rate))
+
+    def convert(self, amount):
+        if amount is None:
+            return ZERO
+        try:
+            if type(amount) is not Decimal:
+                amount = Decimal(str(amount))
+            if self.rate is not None:
+                amount = amount * self.rate
+            return amount.quantize(CENT)
+        except (TypeError, ValueError, AttributeError):
+            return ZERO
+
+    __call__ = convert
+
+    def convert_many(self, amounts, attr=None):
+        """Convert an iterable of amounts, or of objects' ``attr`` values (returns a list)"""
+        convert = self.convert
+        if attr is None:
+            return [convert(amount) for amount in amounts]
+        return [convert(getattr(obj, attr)) for obj in amounts]
+
+
+@lru_cache(maxsize=64)
+def _converter(code, exchange_rate, currency):
+    return CurrencyConverter(currency)
+
+
+def converter_for(currency):
+    """Shared converter for a currency (rebuilt when its rate changes)"""
+    return _converter(currency.code, currency.exchange_rate, currency)
+
+
 def convert_from_usd(amount, currency):
     """Convert USD amount to target currency"""
-    if amount is None:
-        return Decimal("0.00")
-    
     try:
-        amount_decimal = Decimal(str(amount))
-        rate_decimal = Decimal(str(currency.exchange_rate))
-        
-        # If currency is USD, no conversion needed
-        if currency.code == "USD":
-            return amount_decimal.quantize(Decimal("0.01"))
-        
-        # Convert USD to target currency
-        return (amount_decimal * rate_decimal).quantize(Decimal("0.01"))
+        converter = converter_for(currency)
     except (TypeError, ValueError, AttributeError):
-        return Decimal("0.00")
\ No newline at end of file
+        return ZERO
+    return converter.convert(amount)
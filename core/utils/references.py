@@ -0,0 +1,171 @@
+# core/utils/references.py
+import logging
+import os
+import secrets
+import socket
+import threading
+import time
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Snowflake layout: 41 bits of milliseconds since EPOCH_MS, 10 bits of
+# worker id, 12 bits of per-millisecond sequence (63 bits in total)
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Crockford base32 (no I, L, O, U); 13 fixed-width digits keep string order == numeric order
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+WIDTH = 13
+
+
+def encode_base32(number):
+    digits = []
+    for _ in range(WIDTH):
+        number, remainder = divmod(number, 32)
+        digits.append(ALPHABET[remainder])
+    return ''.join(reversed(digits))
+
+
+def lease_worker_id(owner, ttl):
+    """
+    Claim a worker id no running process holds: the oldest expired lease
+    (taken with a conditional UPDATE) or the next id never leased (INSERT).
+    A lost race to another process just moves on to the next candidate.
+    """
+    from core.models import ReferenceWorkerLease  # core.models imports this module
+
+    leases = ReferenceWorkerLease.objects
+    for _ in range(MAX_WORKER + 1):
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=ttl)
+        expired = (
+            leases.filter(expires_at__lte=now)
+            .order_by('expires_at')
+            .values_list('worker_id', 'expires_at')
+            .first()
+        )
+        if expired is not None:
+            worker_id, previous = expired
+            # Only succeeds if nobody renewed or took it since we looked
+            if leases.filter(worker_id=worker_id, expires_at=previous).update(owner=owner, expires_at=expires_at):
+                return worker_id
+            continue
+
+        highest = leases.order_by('-worker_id').values_list('worker_id', flat=True).first()
+        worker_id = 0 if highest is None else highest + 1
+        if worker_id > MAX_WORKER:
+            break
+        try:
+            with transaction.atomic():
+                leases.create(worker_id=worker_id, owner=owner, expires_at=expires_at)
+            return worker_id
+        except IntegrityError:
+            continue
+    raise RuntimeError(f"All {MAX_WORKER + 1} reference worker ids are leased")
+
+
+def renew_worker_lease(worker_id, owner, ttl):
+    """Extend our lease; False if it expired and another process took the id"""
+    from core.models import ReferenceWorkerLease
+
+    return bool(
+        ReferenceWorkerLease.objects.filter(worker_id=worker_id, owner=owner)
+        .update(expires_at=timezone.now() + timedelta(seconds=ttl))
+    )
+
+
+class ReferenceAllocator:
+    """
+    Unique, monotonic transaction references without a DB round trip.
+
+    Each reference packs (milliseconds, worker id, sequence) into 63 bits
+    and renders it as 13 Crockford base32 digits behind a prefix, e.g.
+    ``TX0DQ3M2Z8K0001``. Within a process, references are strictly
+    increasing. Across processes they are unique because each process
+    (including every forked child) leases its own worker id from
+    ReferenceWorkerLease on first use and renews it every half lease.
+    If the clock steps backwards the allocator keeps counting from the
+    last timestamp it used.
+    """
+
+    def __init__(self, prefix='TX', worker_id=None, clock=time.time):
+        self.prefix = prefix
+        self.clock = clock
+        self._configured_worker = worker_id
+        self._lock = threading.Lock()
+        self._reset()
+        # A forked child must not continue the parent's sequence
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self.worker_id = self._configured_worker
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"[-100:]
+        self._renew_at = 0
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _worker(self):
+        if self._configured_worker is not None:
+            return self._configured_worker
+        now = time.monotonic()
+        if self.worker_id is not None and now < self._renew_at:
+            return self.worker_id
+
+        ttl = settings.REFERENCE_WORKER_LEASE_SECONDS
+        if self.worker_id is None or not renew_worker_lease(self.worker_id, self._owner, ttl):
+            if self.worker_id is not None and self._renew_at:  # a committed lease, not a rolled-back one
+                logger.warning(f"Reference worker lease {self.worker_id} was lost; leasing a new id")
+            self.worker_id = lease_worker_id(self._owner, ttl)
+        # Inside an atomic block the lease is only ours once it commits, so
+        # keep re-checking it until then (immediate outside a transaction)
+        self._renew_at = 0
+        transaction.on_commit(partial(self._leased, self.worker_id, now + ttl / 2))
+        return self.worker_id
+
+    def _leased(self, worker_id, renew_at):
+        if self.worker_id == worker_id:
+            self._renew_at = renew_at
+
+    def _now_ms(self):
+        return int(self.clock() * 1000) - EPOCH_MS
+
+    def allocate(self, count):
+        """``count`` consecutive references reserved under one lock acquisition"""
+        ids = []
+        with self._lock:
+            worker = self._worker()
+            while len(ids) < count:
+                now = max(self._now_ms(), self._last_ms)
+                if now == self._last_ms:
+                    if self._sequence >= MAX_SEQUENCE:
+                        # Sequence exhausted for this millisecond: move to the next one
+                        self._last_ms += 1
+                        self._sequence = 0
+                    else:
+                        self._sequence += 1
+                else:
+                    self._last_ms = now
+                    self._sequence = 0
+                ids.append(
+                    (self._last_ms << (WORKER_BITS + SEQUENCE_BITS))
+                    | (worker << SEQUENCE_BITS)
+                    | self._sequence
+                )
+        return [f"{self.prefix}{encode_base32(number)}" for number in ids]
+
+    def next(self):
+        return self.allocate(1)[0]
+
+
+# Shared per-process allocator for Transaction.reference
+transaction_references = ReferenceAllocator()
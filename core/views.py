@@ -5,17 +5,35 @@ from django.shortcuts import get_object_or_404, render
 from decimal import Decimal
 from django.shortcuts import render, redirect
 from django.contrib.auth import login
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction as db_transaction
 from django.db.models import Sum
 
-from core.services.price_fetcher import PriceFetcher
-from .models import Asset, Currency, Transaction, UserProfile,Wallet
+from .models import Asset, PriceTick, Transaction, User, UserProfile,Wallet
 from core.models import Investment
+from core.services.asset_facets import category_facets
+from core.services.currency_registry import currency_registry
+from core.services.exports import EXPORTS, FORMATS, STREAMERS, export_rows, parse_range
+from core.services.fx_rates import RateTimeline
+from core.services.maturity_scheduler import notify_maturity
+from core.services.portfolio import Portfolio
+from core.services.price_history import PriceHistory
+from core.services.price_stream import price_broadcaster
+from core.services.quote_cache import quote_snapshot
+from core.services.tick_archive import from_epoch_us, tick_archive
+from core.services.transaction_history import PAGE_SIZE, TransactionHistory
+from core.services.wallet import InsufficientFunds, WalletService
 from core.utils.currency import convert_from_usd, get_user_currency
 from .forms import ContactForm, DepositForm, PasswordChangeForm, ProfileUpdateForm, RegisterForm, UserUpdateForm, WithdrawalForm
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
+import asyncio
+import heapq
 import json
 from django.contrib.auth import login, logout, authenticate, update_session_auth_hash
 
@@ -47,31 +65,15 @@ def profile(request):
     currency = get_user_currency(request)
     
     # Get user's wallet
-    try:
-        wallet = Wallet.objects.get(user=request.user)
-        wallet_balance = convert_from_usd(wallet.available_balance, currency)
-        wallet_equity = convert_from_usd(wallet.locked_balance, currency)
-        wallet_total = convert_from_usd(wallet.total_balance(), currency)
-    except Wallet.DoesNotExist:
-        wallet_balance = Decimal('0')
-        wallet_equity = Decimal('0')
-        wallet_total = Decimal('0')
-        wallet = None
-    
-    # Get investment stats
-    investments = Investment.objects.filter(user=request.user)
-    
-    # Calculate total invested
-    total_invested_usd = investments.aggregate(
-        total=Sum('invested_amount')
-    )['total'] or Decimal('0')
-    total_invested = convert_from_usd(total_invested_usd, currency)
-    
-    # Calculate total profit/loss
-    total_profit_loss_usd = investments.aggregate(
-        total=Sum('actual_profit_loss')
-    )['total'] or Decimal('0')
-    total_profit_loss = convert_from_usd(total_profit_loss_usd, currency)
+    wallet = request.account.wallet
+    wallet_balance = convert_from_usd(wallet.available_balance, currency)
+    wallet_equity = convert_from_usd(wallet.locked_balance, currency)
+    wallet_total = convert_from_usd(wallet.total_balance(), currency)
+    
+    # Get investment stats (materialized per user)
+    stats = Portfolio.stats_for(request.user)
+    total_invested = convert_from_usd(stats.invested_total, currency)
+    total_profit_loss = convert_from_usd(stats.net_pl, currency)
     
     # Handle form submissions
     if request.method == 'POST':
@@ -152,22 +154,19 @@ def update_theme(request):
 def switch_currency(request):
     if request.method == "POST":
         code = request.POST.get("currency")
-        try:
-            currency = Currency.objects.get(code=code, is_active=True)
-            
+        currency = currency_registry.get(code)
+        if currency is not None:
             # Update user's wallet currency preference
-            wallet = Wallet.objects.get(user=request.user)
+            wallet = request.account.wallet
             wallet.currency = currency.code
-            wallet.save()
+            wallet.save(update_fields=['currency'])
+            request.account.refresh()
             
             # Set cookie for consistency
             response = redirect(request.META.get("HTTP_REFERER", "/"))
             response.set_cookie('currency', currency.code, max_age=30*24*60*60)
             return response
-            
-        except Currency.DoesNotExist:
-            # If currency doesn't exist, redirect without changes
-            pass
+        # If currency doesn't exist, redirect without changes
     
     return redirect(request.META.get("HTTP_REFERER", "/"))
 
@@ -179,9 +178,9 @@ def get_currency_context(user):
     except Wallet.DoesNotExist:
         currency_code = "USD"
     
-    current_currency = Currency.objects.filter(code=currency_code, is_active=True).first()
+    current_currency = currency_registry.get(currency_code)
     if not current_currency:
-        current_currency = Currency.objects.filter(is_active=True).first()
+        current_currency = currency_registry.active()[0]
 
     currency_code = current_currency.code
     currency_symbol = current_currency.symbol  # FIX: Get symbol from currency object
@@ -192,30 +191,25 @@ def get_currency_context(user):
 def index(request):
     """Main dashboard with assets preview"""
     # Get or create wallet
-    wallet, created = Wallet.objects.get_or_create(
-        user=request.user,
-        defaults={
-            'available_balance': Decimal('0.00'),  # Give some starting balance
-            'locked_balance': Decimal('0.00'),
-            'bonus_balance': Decimal('0.00'),
-            'bonus_claimed': Decimal('0.00'),
-            'currency': 'USD'
-        }
-    )
+    wallet, created = request.account.wallet, request.account.wallet_created
     
     if created:
         messages.info(request, 'Welcome! Your wallet has been created')
     
     currency = get_user_currency(request)
+    convert = request.account.converter
     
     # =========================
     # WALLET CONVERSION (USD → selected currency)
     # =========================
+    available, locked, bonus, total = convert.convert_many((
+        wallet.available_balance, wallet.locked_balance, wallet.bonus_balance, wallet.total_balance(),
+    ))
     wallet_data = {
-        'available': convert_from_usd(wallet.available_balance, currency),
-        'locked': convert_from_usd(wallet.locked_balance, currency),
-        'bonus': convert_from_usd(wallet.bonus_balance, currency),
-        'total': convert_from_usd(wallet.total_balance(), currency),
+        'available': available,
+        'locked': locked,
+        'bonus': bonus,
+        'total': total,
     }
     
 
@@ -234,49 +228,21 @@ def index(request):
     # =========================
     # PnL CALCULATION (USD → currency) - FIXED
     # =========================
-    total_profit_usd = completed_investments.filter(
-        actual_profit_loss__gt=0  # ✅ FIXED: Changed profit_loss to actual_profit_loss
-    ).aggregate(total=Sum('actual_profit_loss'))['total'] or Decimal('0')  # ✅ FIXED
-    
-    total_loss_usd = completed_investments.filter(
-        actual_profit_loss__lt=0  # ✅ FIXED: Changed profit_loss to actual_profit_loss
-    ).aggregate(total=Sum('actual_profit_loss'))['total'] or Decimal('0')  # ✅ FIXED
-    
-    net_pl_usd = total_profit_usd + total_loss_usd
-    
-    invested_total_usd = completed_investments.aggregate(
-        total=Sum('invested_amount')
-    )['total'] or Decimal('0')
-    
-    net_pl_percentage = (
-        (net_pl_usd / invested_total_usd) * 100
-        if invested_total_usd > 0 else 0
-    )
-    
-    # =========================
-    # CONVERT PnL TO USER'S CURRENCY
-    # =========================
-    investment_stats = {
-        'total_profit': convert_from_usd(total_profit_usd, currency),
-        'total_loss': convert_from_usd(total_loss_usd, currency),
-        'net_pl': convert_from_usd(net_pl_usd, currency),
-        'net_pl_percentage': round(net_pl_percentage, 2),
-        'progress_width': min(abs(net_pl_percentage), 100),
-        'active_investments': active_investments.count(),
-    }
+    investment_stats = get_investment_stats(request.user, currency)
     
     # =========================
     # TRANSACTIONS - CRITICAL FIX
     # =========================
-    recent_transactions = Transaction.objects.filter(
+    recent_transactions = list(Transaction.objects.filter(
         user=request.user
-    ).order_by('-created_at')[:5]
+    ).order_by('-created_at')[:5])
     
     # Convert transaction amounts for display
-    for transaction in recent_transactions:
+    display_amounts = convert.convert_many(recent_transactions, 'amount')
+    for transaction, display_amount in zip(recent_transactions, display_amounts):
         # Store both the original amount and converted amount
         transaction.original_amount = transaction.amount  # USD amount
-        transaction.display_amount = convert_from_usd(transaction.amount, currency)  # Converted amount
+        transaction.display_amount = display_amount  # Converted amount
         transaction.display_currency_symbol = currency.symbol
     
     # =========================
@@ -284,14 +250,19 @@ def index(request):
     # =========================
     from .models import Asset
     
-    # Get top 6 active assets (mix of categories)
-    market_assets = Asset.objects.filter(is_active=True).order_by('?')[:8]
+    # Pick 8 random assets from the shared quote snapshot (prices come from it too)
+    featured_ids = quote_snapshot.sample_ids(8)
+    if featured_ids:
+        market_assets = Asset.objects.filter(is_active=True, id__in=featured_ids)
+    else:
+        market_assets = Asset.objects.filter(is_active=True)[:8]
+    market_assets = quote_snapshot.apply(market_assets)
     
     # Add display prices in user's currency
     for asset in market_assets:
-        asset.display_price = convert_from_usd(asset.current_price, currency)
-        asset.display_min_investment = convert_from_usd(asset.min_investment, currency)
-        asset.display_max_investment = convert_from_usd(asset.max_investment, currency)
+        asset.display_price = convert(asset.current_price)
+        asset.display_min_investment = convert(asset.min_investment)
+        asset.display_max_investment = convert(asset.max_investment)
         asset.last_updated_str = asset.last_updated.strftime("%H:%M:%S") if asset.last_updated else "Never"
         
         # Add investment hours options with expected returns
@@ -311,9 +282,9 @@ def index(request):
             profit = asset.calculate_profit(example_investment, duration['hours'])
             asset.example_returns[duration['hours']] = {
                 'profit_usd': profit,
-                'profit_display': convert_from_usd(profit, currency),
+                'profit_display': convert(profit),
                 'total_usd': example_investment + profit,
-                'total_display': convert_from_usd(example_investment + profit, currency),
+                'total_display': convert(example_investment + profit),
             }
             
     # =========================
@@ -354,7 +325,7 @@ def index(request):
         'investment_form': investment_form,
         'currency_symbol': currency.symbol,
         'currency_code': currency.code,
-        'available_currencies': Currency.objects.filter(is_active=True),
+        'available_currencies': currency_registry.active(),
         'current_currency': currency,
     }
     
@@ -381,16 +352,7 @@ def profile(request):
 @login_required
 def wallet(request):
     # FIX: Get or create wallet
-    user_wallet, created = Wallet.objects.get_or_create(
-        user=request.user,
-        defaults={
-            'available_balance': Decimal('0.00'),
-            'locked_balance': Decimal('0.00'),
-            'bonus_balance': Decimal('0.00'),
-            'bonus_claimed': Decimal('0.00'),
-            'currency': 'USD'
-        }
-    )
+    user_wallet = request.account.wallet
     
     currency = get_user_currency(request)
     
@@ -420,36 +382,7 @@ def wallet(request):
     # =========================
     # PnL CALCULATION (USD → currency)
     # =========================
-    total_profit_usd = completed_investments.filter(
-        actual_profit_loss__gt=0  # ✅ FIXED: Changed profit_loss to actual_profit_loss
-    ).aggregate(total=Sum('actual_profit_loss'))['total'] or Decimal('0')  # ✅ FIXED
-    
-    total_loss_usd = completed_investments.filter(
-        actual_profit_loss__lt=0  # ✅ FIXED: Changed profit_loss to actual_profit_loss
-    ).aggregate(total=Sum('actual_profit_loss'))['total'] or Decimal('0')  # ✅ FIXED
-    
-    net_pl_usd = total_profit_usd + total_loss_usd
-    
-    invested_total_usd = completed_investments.aggregate(
-        total=Sum('invested_amount')
-    )['total'] or Decimal('0')
-    
-    net_pl_percentage = (
-        (net_pl_usd / invested_total_usd) * 100
-        if invested_total_usd > 0 else 0
-    )
-    
-    # =========================
-    # CONVERT PnL TO USER'S CURRENCY
-    # =========================
-    investment_stats = {
-        'total_profit': convert_from_usd(total_profit_usd, currency),
-        'total_loss': convert_from_usd(total_loss_usd, currency),
-        'net_pl': convert_from_usd(net_pl_usd, currency),
-        'net_pl_percentage': round(net_pl_percentage, 2),
-        'progress_width': min(abs(net_pl_percentage), 100),
-        'active_investments': active_investments.count(),
-    }
+    investment_stats = get_investment_stats(request.user, currency)
     
     # =========================
     # TRANSACTIONS
@@ -475,30 +408,29 @@ def wallet(request):
         'recent_transactions': recent_transactions,
         'currency_symbol': currency.symbol,
         'currency_code': currency.code,
-        'available_currencies': Currency.objects.filter(is_active=True),
+        'available_currencies': currency_registry.active(),
         'current_currency': currency,
     }
 
     return render(request, "wallet.html", context)
 
-def get_user_wallet(user):
-    """Get or create wallet for user"""
-    wallet, created = Wallet.objects.get_or_create(
-        user=user,
-        defaults={
-            'available_balance': Decimal('0.00'),
-            'locked_balance': Decimal('0.00'),
-            'bonus_balance': Decimal('0.00'),
-            'bonus_claimed': Decimal('0.00'),
-            'currency': 'USD'
-        }
-    )
-    return wallet
+def get_investment_stats(user, currency):
+    """Dashboard P/L block, converted from USD to the user's currency"""
+    stats = Portfolio.stats_for(user)
+    net_pl_percentage = stats.net_pl_percentage
+    return {
+        'total_profit': convert_from_usd(stats.total_profit, currency),
+        'total_loss': convert_from_usd(stats.total_loss, currency),
+        'net_pl': convert_from_usd(stats.net_pl, currency),
+        'net_pl_percentage': round(net_pl_percentage, 2),
+        'progress_width': min(abs(net_pl_percentage), 100),
+        'active_investments': stats.active_count,
+    }
 
 @login_required
 def wallet_view(request):
     """Main wallet dashboard"""
-    wallet = get_user_wallet(request.user)
+    wallet = request.account.wallet
     currency = get_user_currency(request)
 
     
@@ -545,7 +477,10 @@ def wallet_view(request):
     
     # Handle quick actions
     if request.method == 'POST':
-        amount = Decimal(request.POST.get('amount', '0'))
+        try:
+            amount = Decimal(request.POST.get('amount', '0'))
+        except ArithmeticError:
+            amount = Decimal('0')  # not a number: rejected below
         action = request.POST.get('action')
         
         
@@ -555,46 +490,35 @@ def wallet_view(request):
             # User enters amount in their currency, convert to USD for storage
             amount_usd = amount / currency.exchange_rate
             
-            wallet.available_balance += amount_usd
-            wallet.save()
-            
-            # Create transaction
-            Transaction.objects.create(
-                user=request.user,
-                wallet=wallet,
-                transaction_type='deposit',
-                payment_method='wallet',
-                amount=amount_usd,  # Store in USD
-                status='completed',
-                description=f"Quick deposit of {currency.symbol}{amount:.2f}"
-            )
-            
-            messages.success(request, f"Deposited {currency.symbol}{amount:.2f} successfully!")
-            return redirect('wallet_view')  # Redirect to self
+            # Store in USD
+            try:
+                WalletService.credit(
+                    wallet, amount_usd, Transaction.DEPOSIT,
+                    description=f"Quick deposit of {currency.symbol}{amount:.2f}",
+                )
+            except ValueError:
+                # Rounds to less than one US cent
+                messages.error(request, "Amount is too small to deposit")
+            else:
+                messages.success(request, f"Deposited {currency.symbol}{amount:.2f} successfully!")
+                return redirect('wallet_view')  # Redirect to self
             
         elif action == 'withdraw':
             # User enters amount in their currency, convert to USD for check
             amount_usd = amount / currency.exchange_rate
             
-            if wallet.available_balance >= amount_usd:
-                wallet.available_balance -= amount_usd
-                wallet.save()
-                
-                # Create transaction
-                Transaction.objects.create(
-                    user=request.user,
-                    wallet=wallet,
-                    transaction_type='withdrawal',
-                    payment_method='wallet',
-                    amount=-amount_usd,  # Negative for withdrawal
-                    status='completed',
-                    description=f"Quick withdrawal of {currency.symbol}{amount:.2f}"
+            try:
+                WalletService.debit(
+                    wallet, amount_usd, Transaction.WITHDRAWAL,
+                    description=f"Quick withdrawal of {currency.symbol}{amount:.2f}",
                 )
                 
                 messages.success(request, f"Withdrew {currency.symbol}{amount:.2f} successfully!")
                 return redirect('wallet_view')
-            else:
+            except InsufficientFunds:
                 messages.error(request, "Insufficient balance")
+            except ValueError:
+                messages.error(request, "Amount is too small to withdraw")
         else:
             messages.error(request, "Invalid action")
     
@@ -615,7 +539,7 @@ def wallet_view(request):
 @login_required
 def deposit(request):
     """Deposit page with form"""
-    wallet = get_user_wallet(request.user)
+    wallet = request.account.wallet
     currency = get_user_currency(request)
     
     form = DepositForm(currency=currency)
@@ -630,23 +554,18 @@ def deposit(request):
             # Convert to USD for storage
             amount_usd = amount_display / currency.exchange_rate
             
-            # Update wallet
-            wallet.available_balance += amount_usd
-            wallet.save()
-            
-            # Create transaction
-            Transaction.objects.create(
-                user=request.user,
-                wallet=wallet,
-                transaction_type='deposit',
-                payment_method=payment_method,
-                amount=amount_usd,
-                status='completed',
-                description=f"Deposit of {currency.symbol}{amount_display:.2f} via {payment_method}"
-            )
-            
-            messages.success(request, f"Deposit of {currency.symbol}{amount_display:.2f} successful!")
-            return redirect('wallet_view')  # Change to your actual URL
+            # Update wallet and record the transaction
+            try:
+                WalletService.credit(
+                    wallet, amount_usd, Transaction.DEPOSIT, payment_method,
+                    description=f"Deposit of {currency.symbol}{amount_display:.2f} via {payment_method}",
+                )
+            except ValueError:
+                # Rounds to less than one US cent
+                form.add_error('amount', "Amount is too small to deposit")
+            else:
+                messages.success(request, f"Deposit of {currency.symbol}{amount_display:.2f} successful!")
+                return redirect('wallet_view')  # Change to your actual URL
     
     context = {
         'form': form,
@@ -660,7 +579,7 @@ def deposit(request):
 @login_required
 def withdraw(request):
     """Withdraw page with form"""
-    wallet = get_user_wallet(request.user)
+    wallet = request.account.wallet
     currency = get_user_currency(request)
     
     # Get recent withdrawals
@@ -696,24 +615,19 @@ def withdraw(request):
             # Convert to USD for storage
             amount_usd = amount_display / currency.exchange_rate
             
-            if 0 < amount_usd <= wallet.available_balance:
-                wallet.available_balance -= amount_usd
-                wallet.save()
-                
-                Transaction.objects.create(
-                    user=request.user,
-                    wallet=wallet,
-                    transaction_type='withdrawal',
-                    payment_method=payment_method,
-                    amount=-amount_usd,
-                    status='pending',
-                    description=f"Withdrawal of {currency.symbol}{amount_display:.2f} via {payment_method}"
+            try:
+                WalletService.debit(
+                    wallet, amount_usd, Transaction.WITHDRAWAL, payment_method,
+                    description=f"Withdrawal of {currency.symbol}{amount_display:.2f} via {payment_method}",
+                    status=Transaction.PENDING,
                 )
                 
                 messages.success(request, f"Withdrawal request of {currency.symbol}{amount_display:.2f} submitted!")
                 return redirect('wallet_view')  # Change to your actual URL
-            else:
+            except InsufficientFunds:
                 messages.error(request, "Insufficient balance")
+            except ValueError:
+                form.add_error('amount', "Amount is too small to withdraw")
     
     # Convert withdrawals for display
     for w in withdrawals:
@@ -737,29 +651,12 @@ def withdraw(request):
 def assets_view(request):
     """Main assets page with manual price updates"""
     
-    # FIX: Get or create wallet
-    wallet, created = Wallet.objects.get_or_create(
-        user=request.user,
-        defaults={
-            'available_balance': Decimal('0.00'),
-            'locked_balance': Decimal('0.00'),
-            'bonus_balance': Decimal('0.00'),
-            'bonus_claimed': Decimal('0.00'),
-            'currency': 'USD'
-        }
-    )
+    wallet = request.account.wallet
     
     currency = get_user_currency(request)
+    convert = request.account.converter
     
-    # Check if we should update prices
-    refresh = request.GET.get('refresh', 'false').lower() == 'true'
-    update_all = request.GET.get('update_all', 'false').lower() == 'true'
-    
-    if update_all:
-        # Update all prices
-        updated_count = PriceFetcher.update_all_prices()
-        messages.success(request, f'Updated prices for {updated_count} assets')
-        return redirect('assets')
+    # Prices are ticked by the run_price_ticker command; this view only reads them
     
     # =========================
     # WALLET SUMMARY
@@ -767,93 +664,55 @@ def assets_view(request):
     wallet_balance = convert_from_usd(wallet.available_balance, currency)
     wallet_equity = convert_from_usd(wallet.locked_balance, currency)
     
-    user_investments = Investment.objects.filter(user=request.user)
-    
-    active_investments = Investment.objects.filter(
-        user=request.user,
-        status='active'
-    )
-    
-    completed_investments = Investment.objects.filter(
-        user=request.user
-    ).exclude(status='active')
-    
-    total_invested_usd = user_investments.aggregate(
-        total=Sum('invested_amount')
-    )['total'] or Decimal('0')
-    total_invested = convert_from_usd(total_invested_usd, currency)
-    
-    total_profit_usd = completed_investments.filter(
-        actual_profit_loss__gt=0  # ✅ FIXED: Changed profit_loss to actual_profit_loss
-    ).aggregate(total=Sum('actual_profit_loss'))['total'] or Decimal('0')  # ✅ FIXED
-    
-    total_loss_usd = completed_investments.filter(
-        actual_profit_loss__lt=0  # ✅ FIXED: Changed profit_loss to actual_profit_loss
-    ).aggregate(total=Sum('actual_profit_loss'))['total'] or Decimal('0')  # ✅ FIXED
-    
-    net_pl_usd = total_profit_usd + total_loss_usd
-    
-    invested_total_usd = completed_investments.aggregate(
-        total=Sum('invested_amount')
-    )['total'] or Decimal('0')
-    
-    net_pl_percentage = (
-        (net_pl_usd / invested_total_usd) * 100
-        if invested_total_usd > 0 else 0
-    )
+    # Investment totals (materialized per user)
+    stats = Portfolio.stats_for(request.user)
+    total_invested = convert_from_usd(stats.invested_total, currency)
+    total_loss_usd = stats.total_loss
     
     # =========================
-    # GET ASSETS WITH OPTIONAL UPDATE
+    # GET ASSETS
     # =========================
     
-    # Update stale prices (older than 5 minutes)
-    stale_assets = Asset.objects.filter(
-        is_active=True,
-        last_updated__lt=datetime.now() - timedelta(minutes=5)  # FIXED: Use timedelta directly
-    )[:10]  # Update max 10 at a time
-    
-    if stale_assets.exists() and refresh:
-        for asset in stale_assets:
-            PriceFetcher.update_asset_price(asset)
-        messages.info(request, f'Refreshed {len(stale_assets)} stale prices')
+    # Assets the ticker hasn't reached yet (shown as a hint only)
+    if quote_snapshot.quotes():
+        stale_count = quote_snapshot.stale_count()
+    else:
+        stale_count = Asset.objects.filter(Asset.stale_filter(), is_active=True).count()
     
-    # Get all active assets
+    # Get active assets for the selected category (latest prices overlaid from the quote snapshot)
+    category = request.GET.get('category', 'all')
     market_assets = Asset.objects.filter(is_active=True).order_by('display_order', 'name')
+    if category != 'all':
+        market_assets = market_assets.filter(category=category)
+    
+    # Evaluate once so the display fields below survive into the template
+    market_assets = quote_snapshot.apply(market_assets)
     
     # Add display prices in user's currency
     for asset in market_assets:
-        asset.display_price = convert_from_usd(asset.current_price, currency)
-        asset.display_min_investment = convert_from_usd(asset.min_investment, currency)
-        asset.display_max_investment = convert_from_usd(asset.max_investment, currency)
+        asset.display_price = convert(asset.current_price)
+        asset.display_min_investment = convert(asset.min_investment)
+        asset.display_max_investment = convert(asset.max_investment)
         asset.last_updated_str = asset.last_updated.strftime("%H:%M:%S") if asset.last_updated else "Never"
     
     # =========================
     # CATEGORY FILTERS
     # =========================
-    category = request.GET.get('category', 'all')
-    if category != 'all':
-        market_assets = market_assets.filter(category=category)
-    
-    # Group by category for the category filter
-    categories = [
-        {'id': 'all', 'name': 'All Assets', 'count': Asset.objects.filter(is_active=True).count()},
-        {'id': 'crypto', 'name': 'Cryptocurrency', 'count': Asset.objects.filter(category='crypto', is_active=True).count()},
-        {'id': 'forex', 'name': 'Forex', 'count': Asset.objects.filter(category='forex', is_active=True).count()},
-        {'id': 'futures', 'name': 'Futures', 'count': Asset.objects.filter(category='futures', is_active=True).count()},
-        {'id': 'stock', 'name': 'Stocks', 'count': Asset.objects.filter(category='stock', is_active=True).count()},
-    ]
+    # Group by category for the category filter (one cached grouped query)
+    categories = category_facets()
     
     # =========================
     # TOP GAINERS & LOSERS
     # =========================
-    sorted_assets = sorted(
-        market_assets,
-        key=lambda x: x.change_percentage,
-        reverse=True
-    )
-    
-    top_gainers = sorted_assets[:5]
-    top_losers = sorted_assets[-5:]
+    # Ranked by the price updater on every publish; fall back to ranking here
+    leaders = quote_snapshot.leaders(category)
+    if leaders:
+        assets_by_id = {str(asset.id): asset for asset in market_assets}
+        top_gainers = [assets_by_id[i] for i in leaders['gainers'] if i in assets_by_id]
+        top_losers = [assets_by_id[i] for i in leaders['losers'] if i in assets_by_id]
+    else:
+        top_gainers = heapq.nlargest(5, market_assets, key=lambda x: x.change_percentage)
+        top_losers = heapq.nsmallest(5, market_assets, key=lambda x: x.change_percentage)
     
     # =========================
     # EDUCATIONAL TIPS
@@ -861,7 +720,7 @@ def assets_view(request):
     educational_tips = [
         {
             'title': 'Click Refresh for Latest Prices',
-            'content': 'Prices update automatically every 5 minutes, or click refresh for immediate updates.'
+            'content': 'Prices update automatically in the background, or click refresh to reload the latest prices.'
         },
         {
             'title': 'Filter by Asset Type',
@@ -898,11 +757,13 @@ def assets_view(request):
         'currency_symbol': currency.symbol,
         'currency_code': currency.code,
         'current_currency': currency,
-        'available_currencies': Currency.objects.filter(is_active=True),
+        'available_currencies': currency_registry.active(),
         
         # Refresh info
         'last_refresh': datetime.now().strftime("%H:%M:%S"),
-        'stale_count': stale_assets.count(),
+        'stale_count': stale_count,
+        'price_stream_sse': settings.PRICE_STREAM_SSE,
+        'price_poll_ms': settings.PRICE_POLL_SECONDS * 1000,
     }
     
     return render(request, 'assets.html', context)
@@ -910,19 +771,15 @@ def assets_view(request):
 @login_required
 def asset_detail(request, asset_id):  # asset_id is UUID
     """View asset details for potential investment"""
-    import random
     from decimal import Decimal
-    from django.utils import timezone
     
     asset = get_object_or_404(Asset, id=asset_id)
+    quote_snapshot.apply([asset])
     currency = get_user_currency(request)
     
     # Get user's wallet for balance display
-    try:
-        wallet = Wallet.objects.get(user=request.user)
-        wallet_balance_display = convert_from_usd(wallet.available_balance, currency)
-    except Wallet.DoesNotExist:
-        wallet_balance_display = Decimal('0.00')
+    wallet = request.account.wallet
+    wallet_balance_display = convert_from_usd(wallet.available_balance, currency) if wallet else Decimal('0.00')
     
     # Convert prices to user's currency
     current_price = getattr(asset, 'current_price', Decimal('100.00'))
@@ -991,25 +848,20 @@ def asset_detail(request, asset_id):  # asset_id is UUID
             'total_display': convert_from_usd(min_investment + profit_usd, currency),
         }
     
-    # Get asset performance history (simulated)
+    # Get asset performance history (last 30 daily candles from the price ticker)
     performance_history = []
-    for i in range(30, 0, -1):
-        # Simulate price fluctuations (convert float to Decimal)
-        base_price = current_price
-        fluctuation = Decimal(str(random.uniform(-0.05, 0.05)))  # Convert float to Decimal
-        simulated_price = base_price * (Decimal('1') + fluctuation)
-        
+    for candle in PriceHistory.recent_candles(asset, '1d', limit=30):
         performance_history.append({
-            'date': timezone.now() - timezone.timedelta(days=i),
-            'price': convert_from_usd(simulated_price, currency),
-            'change': float(fluctuation * Decimal('100'))  # Convert to float for template
+            'date': candle.bucket_start,
+            'price': convert_from_usd(candle.close, currency),
+            'change': float(candle.change_percentage)  # Convert to float for template
         })
     
-    # Get similar assets
-    similar_assets = Asset.objects.filter(
-        category=asset.category,
-        is_active=True
-    ).exclude(id=asset.id).order_by('?')[:4]
+    # Get similar assets (random picks from the quote snapshot, no ORDER BY RANDOM())
+    similar_ids = quote_snapshot.sample_ids(4, category=asset.category, exclude=[asset.id])
+    similar_assets = quote_snapshot.apply(
+        Asset.objects.filter(id__in=similar_ids, is_active=True)
+    )
     
     # Convert prices for similar assets
     for similar_asset in similar_assets:
@@ -1036,6 +888,101 @@ def asset_detail(request, asset_id):  # asset_id is UUID
     return render(request, 'investments/asset_detail.html', context)
 
 
+# Limits for the tick history endpoint
+MAX_TICK_DAYS = 3650
+MAX_TICK_POINTS = 5000
+
+@login_required
+def asset_ticks(request, symbol):
+    """Tick-level price history for charts (JSON), served from the tick archive"""
+    try:
+        days = int(request.GET.get('days', 30))
+        max_points = int(request.GET.get('points', 500))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid days or points'}, status=400)
+    if not 1 <= days <= MAX_TICK_DAYS or not 1 <= max_points <= MAX_TICK_POINTS:
+        return JsonResponse(
+            {'error': f'days must be 1-{MAX_TICK_DAYS} and points 1-{MAX_TICK_POINTS}'}, status=400
+        )
+    
+    end = timezone.now()
+    start = end - timedelta(days=days)
+    
+    # Archived range: zero-copy slice of the memory-mapped file
+    archived = tick_archive.range(symbol, start, end, max_points=max_points)
+    points = list(zip((archived['ts'] // 1000).tolist(), archived['price'].tolist()))
+    
+    # Recent ticks not yet compacted into the archive
+    last_archived = tick_archive.last_timestamp(symbol)
+    recent = PriceTick.objects.filter(asset__symbol=symbol.upper(), timestamp__gte=start)
+    if last_archived is not None:
+        recent = recent.filter(timestamp__gt=from_epoch_us(last_archived))
+    for ts, price in recent.order_by('timestamp').values_list('timestamp', 'price'):
+        points.append((int(ts.timestamp() * 1000), float(price)))
+    
+    # The point budget covers the combined series, not just the archived part
+    if len(points) > max_points:
+        step = -(-len(points) // max_points)  # ceil division
+        points = points[::step]
+    
+    return JsonResponse({'symbol': symbol.upper(), 'ticks': points})
+
+
+def _quote_categories(request):
+    return [c for c in request.GET.get('category', '').split(',') if c and c != 'all']
+
+
+@login_required
+def price_quotes(request):
+    """
+    Polling fallback for price_stream (WSGI deployments). Returns the
+    snapshot version and, unless ?since= is already that version, the
+    (optionally ?category= filtered) quotes.
+    """
+    version = quote_snapshot.version
+    quotes = {}
+    if request.GET.get('since') != str(version):
+        categories = set(_quote_categories(request))
+        quotes = {
+            asset_id: quote for asset_id, quote in quote_snapshot.quotes().items()
+            if not categories or quote['category'] in categories
+        }
+    return JsonResponse({'version': version, 'quotes': quotes})
+
+
+@login_required
+async def price_stream(request):
+    """
+    Server-Sent Events stream of live quote changes. Only served under the
+    ASGI app with PRICE_STREAM_SSE on: under WSGI the never-ending response
+    would hold a worker forever, so clients poll price_quotes instead.
+    Optional ?category=crypto,forex limits the stream to those categories.
+    """
+    if not settings.PRICE_STREAM_SSE or not isinstance(request, ASGIRequest):
+        raise Http404("Live price streaming is not enabled")
+    categories = _quote_categories(request)
+    subscriber = price_broadcaster.subscribe(categories)
+    
+    async def events():
+        try:
+            # Full (filtered) snapshot first, then only changed quotes
+            yield f"event: snapshot\ndata: {json.dumps(price_broadcaster.current(subscriber))}\n\n"
+            while True:
+                try:
+                    changes = await asyncio.wait_for(subscriber.next_changes(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: quotes\ndata: {json.dumps(changes)}\n\n"
+        finally:
+            price_broadcaster.unsubscribe(subscriber)
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # disable proxy buffering (nginx)
+    return response
+
+
 @login_required
 def invest_asset(request, asset_id):
     """Invest in a specific asset with duration"""
@@ -1053,7 +1000,7 @@ def invest_asset(request, asset_id):
                 return redirect('asset_detail', asset_id=asset_id)
             
             # Get user's wallet
-            wallet = Wallet.objects.get(user=request.user)
+            wallet = request.account.wallet
             
             # Convert amount from user's currency to USD for storage
             amount_usd = amount_display / currency.exchange_rate
@@ -1065,37 +1012,30 @@ def invest_asset(request, asset_id):
                 messages.error(request, f'Minimum investment is {currency.symbol}{min_investment_display:.2f}')
                 return redirect('asset_detail', asset_id=asset_id)
             
-            # Check if user has enough balance (compare USD to USD)
-            if wallet.available_balance >= amount_usd:
-                # Create investment with duration
-                investment = Investment.objects.create(
-                    user=request.user,
-                    asset=asset,
-                    invested_amount=amount_usd,
-                    duration_hours=duration_hours,
-                    status='active',
-                    end_time=datetime.now() + timedelta(hours=duration_hours)
-                )
-                
-                # Update wallet
-                wallet.available_balance -= amount_usd
-                wallet.locked_balance += amount_usd
-                wallet.save()
-                
-                # Create transaction record
-                Transaction.objects.create(
-                    user=request.user,
-                    wallet=wallet,
-                    transaction_type='investment',
-                    payment_method='wallet',
-                    amount=-amount_usd,  # Negative for investment
-                    status='completed',
-                    description=f"Invested in {asset.name} for {duration_hours} hours"
-                )
+            # Lock the funds only if the balance covers it (USD to USD, one
+            # conditional UPDATE), then create the investment in the same transaction
+            try:
+                with db_transaction.atomic():
+                    WalletService.lock(
+                        wallet, amount_usd, Transaction.INVESTMENT,
+                        description=f"Invested in {asset.name} for {duration_hours} hours",
+                    )
+                    investment = Investment.objects.create(
+                        user=request.user,
+                        asset=asset,
+                        invested_amount=Decimal(amount_usd).quantize(Decimal('0.01')),
+                        duration_hours=duration_hours,
+                        status='active',
+                        end_time=timezone.now() + timedelta(hours=duration_hours)
+                    )
+                    Portfolio.record_investment(investment)
+                    db_transaction.on_commit(
+                        lambda: notify_maturity(investment.id, investment.user_id, investment.end_time)
+                    )
                 
                 messages.success(request, f'Successfully invested {currency.symbol}{amount_display:.2f} in {asset.name} for {duration_hours} hours')
                 return redirect('assets')
-            else:
+            except InsufficientFunds:
                 # Show helpful error message with both currencies
                 available_display = convert_from_usd(wallet.available_balance, currency)
                 messages.error(request, f'Insufficient balance. You have {currency.symbol}{available_display:.2f} available, trying to invest {currency.symbol}{amount_display:.2f}')
@@ -1117,7 +1057,7 @@ def withdraw_investment(request, investment_id):  # investment_id is UUID
         return redirect('active_investments')
     
     # Get user's wallet
-    wallet = Wallet.objects.get(user=request.user)
+    wallet = request.account.wallet
     currency = get_user_currency(request)
     
     # Calculate total to withdraw (invested amount + profit)
@@ -1182,6 +1122,121 @@ def investment_history(request):
     return render(request, 'investments/history.html', context)
 
 
+@login_required
+def transaction_history(request):
+    """Full wallet transaction history, keyset paginated (newest first)"""
+    currency = get_user_currency(request)
+    transaction_type = request.GET.get('type') or None
+    status = request.GET.get('status') or None
+
+    try:
+        transactions, next_cursor = TransactionHistory.page(
+            request.user, request.GET.get('cursor'), transaction_type, status
+        )
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('transaction_history')
+
+    # Statement amounts use the rate in force when each transaction happened
+    rates = RateTimeline(currency.code)
+    for transaction in transactions:
+        transaction.display_amount = rates.convert(abs(transaction.amount), transaction.created_at)
+        transaction.display_sign = '+' if transaction.amount >= 0 else '-'
+
+    context = {
+        'transactions': transactions,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+        'selected_type': transaction_type or '',
+        'selected_status': status or '',
+        'type_choices': Transaction.TRANSACTION_TYPE_CHOICES,
+        'status_choices': Transaction.STATUS_CHOICES,
+        'currency_symbol': currency.symbol,
+    }
+
+    return render(request, 'transactions/history.html', context)
+
+
+@login_required
+def transaction_history_api(request):
+    """
+    JSON page of transactions: ?cursor=&type=&status=&limit=. ``amount`` is
+    in USD; ``display_amount`` is in the user's currency at the historical rate.
+    """
+    currency = get_user_currency(request)
+    try:
+        transactions, next_cursor = TransactionHistory.page(
+            request.user,
+            request.GET.get('cursor'),
+            request.GET.get('type') or None,
+            request.GET.get('status') or None,
+            request.GET.get('limit') or PAGE_SIZE,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    rates = RateTimeline(currency.code)
+    return JsonResponse({
+        'currency': currency.code,
+        'results': [
+            {
+                'id': transaction.pk,
+                'reference': transaction.reference,
+                'type': transaction.transaction_type,
+                'status': transaction.status,
+                'payment_method': transaction.payment_method,
+                'amount': str(transaction.amount),
+                'display_amount': str(rates.convert(transaction.amount, transaction.created_at)),
+                'description': transaction.description,
+                'created_at': transaction.created_at.isoformat(),
+            }
+            for transaction in transactions
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
+def _export_response(request, kind, fmt, user, currency=None):
+    if kind not in EXPORTS or fmt not in STREAMERS:
+        raise Http404("Unknown export")
+    try:
+        start, end = parse_range(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    code = request.GET.get('currency', '').upper() or currency
+    if code and currency_registry.get(code, active_only=False) is None:
+        return JsonResponse({'error': f'Unknown currency: {code}'}, status=400)
+
+    columns, rows = export_rows(kind, user, start, end, code)
+    response = StreamingHttpResponse(STREAMERS[fmt](columns, rows), content_type=FORMATS[fmt])
+    owner = user.username if user is not None else 'all'
+    response['Content-Disposition'] = f'attachment; filename="{kind}-{owner}-{timezone.now():%Y%m%d}.{fmt}"'
+    return response
+
+
+@login_required
+def export_data(request, kind, fmt):
+    """
+    Stream the user's own transactions/investments (?start=&end= YYYY-MM-DD),
+    with amounts also in their currency (or ?currency=) at historical rates
+    """
+    return _export_response(request, kind, fmt, request.user, get_user_currency(request).code)
+
+
+@staff_member_required
+def staff_export_data(request, kind, fmt):
+    """Stream every user's rows (or ?user=<id>) for finance; ?currency= adds converted amounts"""
+    user = None
+    if request.GET.get('user'):
+        try:
+            user_id = int(request.GET['user'])
+        except ValueError:
+            return JsonResponse({'error': 'user must be a numeric id'}, status=400)
+        user = get_object_or_404(User, pk=user_id)
+    return _export_response(request, kind, fmt, user)
+
+
 @login_required
 def bonus_list(request):
     user = request.user
@@ -1190,24 +1245,10 @@ def bonus_list(request):
     currency = get_user_currency(request)
     
     # Get wallet
-    try:
-        wallet = Wallet.objects.get(user=user)
-    except Wallet.DoesNotExist:
-        wallet = Wallet.objects.create(
-            user=user,
-            available_balance=Decimal('0.00'),
-            locked_balance=Decimal('0.00'),
-            bonus_balance=Decimal('0.00'),
-            bonus_claimed=Decimal('0.00'),
-            currency='USD'
-        )
-    
-    # Get investments - FIXED: Use the actual model name
-    investments = Investment.objects.filter(user=user, status='active')
+    wallet = request.account.wallet
     
-    total_invested = investments.aggregate(
-        total=Sum('invested_amount')
-    )['total'] or Decimal('0.00')
+    # Capital in active investments (materialized per user)
+    total_invested = Portfolio.stats_for(user).active_invested
     
     # Convert total invested to user's currency
     converted_total_invested = convert_from_usd(total_invested, currency)
@@ -1253,28 +1294,12 @@ def bonus_list(request):
         try:
             # Import Bonus model
             from .models import Bonus
-            from .models import Transaction
             
             bonus = Bonus.objects.get(id=bonus_id, user=user, is_claimed=False)
             
-            # Add bonus to wallet (in USD)
-            wallet.available_balance += bonus.amount
-            wallet.save()
-            
-            # Create transaction record
-            Transaction.objects.create(
-                user=user,
-                wallet=wallet,
-                transaction_type='bonus',
-                payment_method='system',
-                amount=bonus.amount,
-                status='completed',
-                description=f"Claimed bonus: {bonus.title}"
-            )
-            
-            # Mark bonus as claimed
-            bonus.is_claimed = True
-            bonus.save()
+            # Mark claimed and add to wallet (in USD) atomically
+            if WalletService.claim_bonus(wallet, bonus) is None:
+                raise Bonus.DoesNotExist("Bonus already claimed")
             
             messages.success(request, f'Bonus "{bonus.title}" claimed successfully!')
             return redirect('bonus_list')
@@ -1296,24 +1321,10 @@ def bonus_list(request):
 
 @login_required
 def claim_bonus(request):
-    wallet = get_user_wallet(request.user)
+    wallet = request.account.wallet
     
-    if not wallet.bonus_claimed:
-        wallet.bonus_balance += Decimal('500.00')
-        wallet.bonus_claimed = True
-        wallet.save()
-        
-        # Create bonus transaction
-        Transaction.objects.create(
-            user=request.user,
-            wallet=wallet,
-            transaction_type='bonus',
-            payment_method='system',
-            amount=Decimal('500.00'),
-            status='completed',
-            description="Welcome bonus claimed"
-        )
-        
+    # Conditional on bonus_claimed, so a double submit can't credit it twice
+    if WalletService.claim_welcome_bonus(wallet, Decimal('500.00')):
         messages.success(request, "Bonus claimed successfully!")
     else:
         messages.warning(request, "Bonus already claimed")
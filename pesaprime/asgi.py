@@ -3,6 +3,11 @@ ASGI config for pesaprime project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this module (e.g. ``uvicorn pesaprime.asgi:application``)
+to enable the live price stream at ``/core/prices/stream/``: it is an async
+Server-Sent Events view, so one worker process can hold thousands of open
+connections that all share a single quote broadcaster.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -45,6 +45,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -92,6 +93,22 @@ DATABASES = {
 }
 
 
+# Cache
+# Per-process LocMem by default (works on read-only hosts such as Vercel).
+# Multi-process deployments should opt in to a shared backend so
+# invalidations (asset facets, currency registry version) reach every worker,
+# e.g. CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#      CACHE_LOCATION=/tmp/pesaprime-cache
+# or a Redis/Memcached backend and URL.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -133,6 +150,53 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Market data provider used by the price ticker ('simulated' or 'http')
+MARKET_DATA = {
+    'PROVIDER': os.environ.get('MARKET_DATA_PROVIDER', 'simulated'),
+    'URL': os.environ.get('MARKET_DATA_URL', 'http://127.0.0.1:8765'),
+    'API_KEY': os.environ.get('MARKET_DATA_API_KEY'),
+    'TIMEOUT': float(os.environ.get('MARKET_DATA_TIMEOUT', '5')),
+    'BATCH_SIZE': 50,
+    'FAILURE_THRESHOLD': 3,
+    'RESET_TIMEOUT': 30,
+}
+
+# Exchange-rate provider used by refresh_fx_rates ('stub' or 'http')
+FX_RATES = {
+    'PROVIDER': os.environ.get('FX_RATES_PROVIDER', 'stub'),
+    'URL': os.environ.get('FX_RATES_URL', 'http://127.0.0.1:8765'),
+    'API_KEY': os.environ.get('FX_RATES_API_KEY'),
+    'TIMEOUT': float(os.environ.get('FX_RATES_TIMEOUT', '5')),
+}
+
+# Live prices on the assets page. Server-Sent Events hold a connection open
+# and only work under the ASGI app (pesaprime/asgi.py); WSGI deployments
+# (e.g. Vercel) poll the quote snapshot every PRICE_POLL_SECONDS instead.
+PRICE_STREAM_SSE = os.environ.get('PRICE_STREAM_SSE', 'False') == 'True'
+PRICE_POLL_SECONDS = int(os.environ.get('PRICE_POLL_SECONDS', '15'))
+
+# Latest-quote snapshot shared by all workers (see core/services/quote_cache.py)
+QUOTE_SNAPSHOT_PATH = os.environ.get('QUOTE_SNAPSHOT_PATH', BASE_DIR / 'var' / 'quotes.snapshot')
+
+# Price tick archive (memory-mapped per-symbol files, see core/services/tick_archive.py)
+TICK_ARCHIVE_DIR = os.environ.get('TICK_ARCHIVE_DIR', BASE_DIR / 'var' / 'tick_archive')
+
+# Investment settlement worker (see core/services/maturity_scheduler.py)
+# Shard k of SHARDS listens on PORT + k and settles users with id % SHARDS == k
+SETTLEMENT_WORKER = {
+    'HOST': os.environ.get('SETTLEMENT_WORKER_HOST', '127.0.0.1'),
+    'PORT': int(os.environ.get('SETTLEMENT_WORKER_PORT', '8766')),
+    'SHARDS': int(os.environ.get('SETTLEMENT_WORKER_SHARDS', '1')),
+    'RESYNC_EVERY': 300,
+}
+
+# Settled transactions older than this move to the archive table (archive_transactions)
+TRANSACTION_ARCHIVE_AFTER_DAYS = int(os.environ.get('TRANSACTION_ARCHIVE_AFTER_DAYS', '180'))
+
+# Transaction references embed a worker id (0-1023) that every process,
+# forked children included, leases from the database on first use
+REFERENCE_WORKER_LEASE_SECONDS = int(os.environ.get('REFERENCE_WORKER_LEASE_SECONDS', '600'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 